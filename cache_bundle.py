@@ -0,0 +1,42 @@
+# share warm caches between machines: export part of the HTML cache to one bundle, merge bundles in
+import argparse
+from datetime import datetime
+
+from html_cache import BACKEND, CACHE_ROOT, HtmlCache
+
+
+def parse_day(value):
+    """YYYY-MM-DD → epoch seconds (local midnight)."""
+    return datetime.strptime(value, "%Y-%m-%d").timestamp()
+
+
+parser = argparse.ArgumentParser(description="Export / import HTML cache bundles.")
+parser.add_argument("--root", default=CACHE_ROOT, help=f"Cache root (default: {CACHE_ROOT})")
+parser.add_argument("--backend", default=BACKEND, choices=["dir", "sqlite"], help=f"Cache backend (default: {BACKEND})")
+commands = parser.add_subparsers(dest="command", required=True)
+
+export_cmd = commands.add_parser("export", help="Pack cached pages into a bundle")
+export_cmd.add_argument("bundle", help="Bundle file to write (e.g. lu4_items.tar)")
+export_cmd.add_argument("--chronicle", action="append", help="Only this chronicle (repeatable)")
+export_cmd.add_argument("--type", action="append", dest="page_type", help="Only this page type, e.g. item, skill, npc (repeatable)")
+export_cmd.add_argument("--since", type=parse_day, help="Only pages fetched on/after YYYY-MM-DD")
+export_cmd.add_argument("--until", type=parse_day, help="Only pages fetched before YYYY-MM-DD")
+
+import_cmd = commands.add_parser("import", help="Merge a bundle into the local cache")
+import_cmd.add_argument("bundle", help="Bundle file to read")
+
+args = parser.parse_args()
+cache = HtmlCache(args.root, backend=args.backend)
+
+if args.command == "export":
+    cache.export_bundle(
+        args.bundle,
+        chronicles=set(args.chronicle) if args.chronicle else None,
+        page_types=set(args.page_type) if args.page_type else None,
+        since=args.since,
+        until=args.until,
+    )
+else:
+    cache.import_bundle(args.bundle)
+
+cache.close()
@@ -0,0 +1,469 @@
+# class pages → rows and XML: extraction shared by the races/classes scripts and the offline reparse
+import json
+import os
+import re
+import xml.etree.ElementTree as ET
+from extract_spec import SKILL_ID
+from html_parser import make_soup
+from urllib.parse import urljoin
+
+BASE_URL = "https://wikipedia1.mw2.wiki"
+CACHE_DIR = "cache/classes_details"  # old cache layouts, imported into the shared cache on first read
+SKILLS_CACHE_DIR = "cache/classes_skills"
+SUMMARY_VARIANT = "all-skills"  # cache variant: class page after clicking the "All skills" tab
+
+
+# --- Helpers ---
+def clean_url(url: str) -> str:
+    return re.sub(r'\?.*$', '', url)
+
+def safe_filename(name: str) -> str:
+    return re.sub(r'[^a-zA-Z0-9_-]+', '_', name)
+
+def extract_bg_url(style: str) -> str:
+    """Extract a URL from a background-image CSS style."""
+    if not style:
+        return ""
+    match = re.search(r'url\((["\']?)(.*?)\1\)', style)
+    if match:
+        url = match.group(2)
+        if url.startswith("/"):
+            return BASE_URL + url
+        return url
+    return ""
+
+def extract_stats_from_html(html: str):
+    """Extract stats and class JSON data from HTML source."""
+    stats = []
+    class_data = []
+    scripts = re.findall(r"<script.*?>.*?</script>", html, re.S)
+    for script in scripts:
+        # --- Extract stat data array ---
+        match = re.search(r"data\s*:\s*\[\s*([\d,\s]+)\s*\]", script)
+        if match:
+            stats = [int(x.strip()) for x in match.group(1).split(",") if x.strip().isdigit()]
+        # --- Extract JSON with class data ---
+        json_match = re.search(r"window\._classData\s*=\s*(\[.*?\]);", script, re.S)
+        if json_match:
+            json_text = json_match.group(1)
+            try:
+                class_data = json.loads(json_text)
+            except json.JSONDecodeError:
+                try:
+                    class_data = eval(json_text.replace("null", "None").replace("true", "True").replace("false", "False"))
+                except Exception:
+                    class_data = []
+        if stats or class_data:
+            break
+    return stats, class_data
+
+def indent_with_tabs(elem: ET.Element, level: int = 0):
+    """Pretty-print XML with tabs instead of spaces."""
+    i = "\n" + ("\t" * level)
+    if len(elem):
+        if not elem.text or not elem.text.strip():
+            elem.text = i + "\t"
+        for idx, e in enumerate(elem):
+            indent_with_tabs(e, level + 1)
+            if not e.tail or not e.tail.strip():
+                e.tail = i + ("\t" if idx < len(elem) - 1 else "")
+        if not elem.tail or not elem.tail.strip():
+            elem.tail = i
+    else:
+        if level and (not elem.tail or not elem.tail.strip()):
+            elem.tail = i
+
+def parse_class_li(li_tag, parent_elem):
+    """Recursively parse <li> into XML <class> elements."""
+    a_tag = li_tag.find("a")
+    if not a_tag:
+        return
+
+    name = a_tag.get_text(strip=True)
+    href = a_tag.get("href")
+    link = BASE_URL + href if href and href.startswith("/") else href
+    is_final = "no-child" in (a_tag.get("class") or [])
+
+    class_elem = ET.SubElement(parent_elem, "class", {"name": name, "link": link or ""})
+    if is_final:
+        return
+
+    # Find nested <ul> of next tier
+    next_ul = li_tag.find("ul", class_="race-class__ul")
+    if next_ul:
+        for child_li in next_ul.find_all("li", recursive=False):
+            parse_class_li(child_li, class_elem)
+
+def parse_race_section(li_tag, parent_elem):
+    """Parse a <li> containing a race (Human, Elf, etc.) into XML."""
+    img_tag = li_tag.find("img")
+    race_icon = ""
+    if img_tag and img_tag.get("src"):
+        race_icon = clean_url(BASE_URL + img_tag["src"]) if img_tag["src"].startswith("/") else img_tag["src"]
+
+    # ✅ Try to extract text immediately after the <img>
+    race_name = "Unknown"
+    if img_tag and img_tag.next_sibling:
+        text = img_tag.next_sibling.strip()
+        if text:
+            race_name = text
+        else:
+            # Fallback: look for direct text nodes that aren't nested
+            direct_texts = [t for t in li_tag.find_all(string=True, recursive=False) if t.strip()]
+            if direct_texts:
+                race_name = direct_texts[0].strip()
+
+    race_elem = ET.SubElement(parent_elem, "race", {"name": race_name, "icon": race_icon})
+
+    first_ul = li_tag.find("ul", class_="race-class__first-ul")
+    if not first_ul:
+        return
+
+    for subtype_li in first_ul.find_all("li", recursive=False):
+        subtype_a = subtype_li.find("a")
+        subtype_name = subtype_a.get_text(strip=True) if subtype_a else "Unknown"
+        subtype_link = BASE_URL + subtype_a["href"] if subtype_a and subtype_a.get("href", "").startswith("/") else ""
+        subtype_elem = ET.SubElement(race_elem, "subtype", {"name": subtype_name, "link": subtype_link})
+
+        next_ul = subtype_li.find("ul", class_="race-class__ul")
+        if next_ul:
+            for class_li in next_ul.find_all("li", recursive=False):
+                parse_class_li(class_li, subtype_elem)
+
+
+def legacy_cache_file(row):
+    """Old cache file of a class page."""
+    name = f"{safe_filename(str(row['race_name']))}_{safe_filename(str(row['subtype_name']))}.html"
+    return os.path.join(CACHE_DIR, str(row["chronicle"]), name)
+
+
+def parse_class_page(html_source, race_name, subtype_name, chronicle, server_id, link, translate=None):
+    """Details row of one class page; translate(text) turns the Russian texts into *_en (None keeps them as is)."""
+    tr = translate or (lambda text: text)
+    soup = make_soup(html_source, "class")
+
+    # --- Extract heading ---
+    heading_el = soup.select_one("#class-heading h1")
+    class_name = heading_el.get_text(strip=True) if heading_el else ""
+    race_icon_el = heading_el.select_one("img") if heading_el else None
+    race_icon = clean_url(BASE_URL + race_icon_el["src"]) if race_icon_el else ""
+
+    # --- Extract description ---
+    desc_el = soup.select_one("#class-desc__text")
+    class_description = desc_el.get_text(" ", strip=True) if desc_el else ""
+    class_description_en = tr(class_description)
+
+    # --- Extract summary table ---
+    summary = {}
+    for tr_el in soup.select("#class-summary__table tr"):
+        key_el = tr_el.select_one("td b")
+        val_el = tr_el.select("td")
+        if key_el and len(val_el) >= 2:
+            key = key_el.get_text(strip=True).rstrip(":")
+            value = val_el[1].get_text(" ", strip=True)
+            summary[key.lower()] = value
+
+    role = tr(summary.get("role", ""))
+    weapon = tr(summary.get("weapon", ""))
+    armor = tr(summary.get("armor", ""))
+
+    # --- Extract right-side image ---
+    class_image_el = soup.select_one("#class-image img")
+    class_image = clean_url(BASE_URL + class_image_el["src"]) if class_image_el else ""
+
+    # --- Extract stats ---
+    stats, class_data = extract_stats_from_html(html_source)
+    STR, DEX, CON, INT, WIT, MEN = (stats + [None] * 6)[:6]  # pad to ensure 6 columns
+
+    # --- Data row ---
+    return {
+        "race_name": race_name,
+        "subtype_name": subtype_name,
+        "class_name": class_name,
+        "race_icon": race_icon,
+        "class_image": class_image,
+        "description_ru": class_description,
+        "description_en": class_description_en,
+        "role": role,
+        "weapon": weapon,
+        "armor": armor,
+        "STR": STR,
+        "DEX": DEX,
+        "CON": CON,
+        "INT": INT,
+        "WIT": WIT,
+        "MEN": MEN,
+        "chronicle": chronicle,
+        "server_id": server_id,
+        "link": link
+    }
+
+
+def parse_race_tree(html_source, limit=None):
+    """<classes> tree of races → subtypes → classes from div#race-class__list, or None if the page has none."""
+    soup = make_soup(html_source, "class")
+    tree_root = soup.select_one("div#race-class__list")
+    if not tree_root:
+        return None
+
+    root_elem = ET.Element("classes")
+    ul_root = tree_root.find("ul")
+    race_items = ul_root.find_all("li", recursive=False)
+    if limit:
+        race_items = race_items[:limit]
+
+    for race_li in race_items:
+        parse_race_section(race_li, root_elem)
+
+    return root_elem
+
+
+def write_race_tree(root_elem, output_xml):
+    """Save the race/class tree as tab-indented XML."""
+    indent_with_tabs(root_elem)
+    ET.ElementTree(root_elem).write(output_xml, encoding="utf-8", xml_declaration=True)
+    print(f"✅ Saved XML → {output_xml}")
+
+
+# --- Class skills ---
+def parse_level_links(page_html):
+    """(level, url) of every "By levels" link on a class page."""
+    soup = make_soup(page_html, "class")
+    links = []
+    for level_link in soup.select("a.skill-level-link"):
+        level_num = level_link.get_text(strip=True)
+        if level_num.isdigit():
+            links.append((level_num, urljoin(BASE_URL, level_link.get("href", ""))))
+    return links
+
+
+def parse_class_level(level_html):
+    """Skills learnt at one class level (attributes of the <skill> nodes); empty without a skills table."""
+    soup = make_soup(level_html, "class_level")
+    skills = []
+    table = soup.find("table", class_="table-skills")
+    tbody = table.find("tbody") if table else None
+    if not tbody:
+        return skills
+
+    for tr in tbody.find_all("tr"):
+        skill_a = tr.find("a", class_="item-name")
+        if not skill_a:
+            continue
+
+        skill_name_full = skill_a.find("span", class_="item-name__content").get_text(strip=True)
+        skill_href = urljoin(BASE_URL, skill_a.get("href", ""))
+        skill_icon_tag = skill_a.find("img")
+        skill_icon = urljoin(BASE_URL, skill_icon_tag["src"]) if skill_icon_tag else ""
+
+        icon_name = os.path.splitext(os.path.basename(skill_icon_tag["src"]))[0] if skill_icon_tag else ""
+        skill_id_match = SKILL_ID.search(skill_href)
+        skill_id = skill_id_match.group(1) if skill_id_match else ""
+
+        note_td = tr.find("td", class_="text-end")
+        note_text = note_td.get_text(strip=True) if note_td else ""
+
+        skill_level = "1"
+        if "Lv." in skill_name_full:
+            parts = skill_name_full.split("Lv.")
+            skill_name = parts[0].strip()
+            skill_level = parts[1].strip(" .")
+        else:
+            skill_name = skill_name_full
+
+        skills.append({
+            "id": skill_id,
+            "name": skill_name,
+            "level": skill_level,
+            "icon_name": icon_name,
+            "url": skill_href,
+            "icon": skill_icon,
+            "note": note_text
+        })
+
+    return skills
+
+
+def add_level_node(skills_node, level_num, skills):
+    """Append <level number=level_num> with one <skill> per parse_class_level entry; return False (and add nothing) if empty."""
+    if not skills:
+        return False
+    level_node = ET.SubElement(skills_node, "level", number=level_num)
+    for skill in skills:
+        ET.SubElement(level_node, "skill", **skill)
+    return True
+
+
+def parse_all_skills(page_html):
+    soup = make_soup(page_html, "class_summary")
+    result = {"active": {}, "passive": {}}
+
+    def base_no_ext(url):
+        if not url:
+            return ""
+        return os.path.splitext(os.path.basename(url))[0]
+
+    # Process both tabs
+    for tab_name in ["active", "passive"]:
+        tab = soup.find("div", id=tab_name)
+        if not tab:
+            continue
+
+        result_tab = result[tab_name]
+
+        # Each table row inside the tab
+        for tr in tab.select("table tbody tr"):
+            toggler = tr.find("div", class_="class-simple__toggler")
+            if not toggler:
+                continue
+
+            category_name = toggler.get_text(strip=True)
+
+            content = tr.find("div", class_="class-simple__content")
+            if not content:
+                continue
+
+            skills = []
+
+            # All skills inside this category
+            for a in content.find_all("a", class_="item-name"):
+                href = a.get("href", "").strip()
+                full_url = urljoin(BASE_URL, href)
+
+                # ID from URL /skill/xxxx-name/1
+                m = SKILL_ID.search(href)
+                skill_id = m.group(1) if m else ""
+
+                # Name (from tooltip title)
+                title_span = a.select_one(".item-tooltip__title")
+                if title_span:
+                    name = title_span.get_text(strip=True)
+                else:
+                    name = a.get_text(strip=True)
+
+                # ICONS (basename without extension)
+                icon_primary = ""
+                icon_panel = ""
+
+                icon_block = a.select_one("span.item-icon")
+                if icon_block:
+                    # main icon <img>
+                    main_img = icon_block.find("img", class_=None)
+                    if main_img:
+                        icon_primary = base_no_ext(main_img["src"])
+
+                    # panel icon <img class="item-icon__panel">
+                    panel_img = icon_block.find("img", class_="item-icon__panel")
+                    if panel_img:
+                        icon_panel = base_no_ext(panel_img["src"])
+
+                # DESCRIPTION
+                tooltip_text = ""
+                tooltip_desc = a.select_one(".item-tooltip > div:nth-of-type(2)")
+                if tooltip_desc:
+                    tooltip_text = tooltip_desc.get_text(" ", strip=True)
+
+                skills.append({
+                    "id": skill_id,
+                    "name": name,
+                    "level": "1",
+                    "url": full_url,
+                    "icon": icon_primary,       # no extension
+                    "icon_panel": icon_panel,   # no extension
+                    "description": tooltip_text
+                })
+
+            result_tab[category_name] = skills
+
+    return result
+
+
+def write_skills_summary_to_xml(class_node, summary_data):
+    """
+    Writes <skills_summary> in this structure:
+
+    <skills_summary>
+        <skills type="active">
+            <category name="Physical skills">
+                <skill .../>
+            </category>
+        </skills>
+
+        <skills type="passive">
+            <category name="Equipment skills">
+                <skill .../>
+            </category>
+        </skills>
+    </skills_summary>
+    """
+
+    # Remove old summary
+    old = class_node.find("skills_summary")
+    if old is not None:
+        class_node.remove(old)
+
+    root_summary = ET.SubElement(class_node, "skills_summary")
+
+    for tab_name, categories in summary_data.items():
+        # <skills type="active"> or <skills type="passive">
+        skills_node = ET.SubElement(root_summary, "skills", type=tab_name)
+
+        for category_name, skills in categories.items():
+            # <category name="Physical skills">
+            cat_node = ET.SubElement(skills_node, "category", name=category_name)
+
+            for sk in skills:
+                ET.SubElement(
+                    cat_node,
+                    "skill",
+                    id=sk["id"],
+                    name=sk["name"],
+                    level=sk["level"],
+                    icon=sk["icon"],          # no extension
+                    icon_panel=sk["icon_panel"],
+                    url=sk["url"]
+                )
+
+
+# --- XML HELPERS ---
+def reorder_class_nodes(elem):
+    """Ensure <skills> comes before <childs> inside each <class>."""
+    for cls in elem.findall(".//class"):
+        skills = cls.find("skills")
+        childs = cls.find("childs")
+        if skills is not None and childs is not None:
+            cls.remove(skills)
+            cls.remove(childs)
+            cls.append(skills)
+            cls.append(childs)
+
+def nest_childs(node):
+    """Recursively ensure nested <class> nodes are linked to their parents (optional)."""
+    for child in list(node.findall("class")):
+        nest_childs(child)
+
+
+def write_classes_skills_xml(root, output_file):
+    """Finalize the class tree (<skills> before <childs>, no empty <childs>) and save it."""
+    print("\n🧹 Finalizing XML structure...")
+
+    for race_node in root.findall(".//race"):
+        for class_node in list(race_node.findall("class")):
+            nest_childs(class_node)
+
+    reorder_class_nodes(root)
+
+    # Remove empty <childs> safely
+    print("🧹 Removing empty <childs> nodes...")
+    for empty_childs in list(root.findall(".//childs")):
+        if len(empty_childs) == 0:
+            for p in root.iter():
+                if empty_childs in list(p):
+                    p.remove(empty_childs)
+                    break
+
+    # --- STEP 6: SAVE OUTPUT ---
+    ET.indent(root, space="  ")
+    ET.ElementTree(root).write(output_file, encoding="utf-8", xml_declaration=True)
+    abs_path = os.path.abspath(output_file)
+    print(f"\n✅ XML with <childs> and <skills> saved to: {abs_path}")
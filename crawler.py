@@ -0,0 +1,61 @@
+# asyncio crawl mode: keep K fetches in flight with a per-host concurrency cap
+import asyncio
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from wiki_urls import is_wiki_url
+
+# --- Config ---
+CONCURRENCY = 16     # requests in flight overall
+PER_HOST_LIMIT = 8   # requests in flight against one hostname
+
+
+def host_of(url):
+    """Per-host slot of url; the wiki's mirror hostnames share one."""
+    return "mw2.wiki" if is_wiki_url(url) else urlsplit(url).netloc
+
+
+async def crawl_async(fetcher, urls, concurrency=CONCURRENCY, per_host=PER_HOST_LIMIT,
+                      required_ids=(), on_result=None, fetch=None):
+    """Fetch urls concurrently; return bodies in the same order as urls.
+
+    Each fetch runs fetcher.get (or fetch(index, url, required_ids), e.g. a
+    cache refetch wrapped around the same fetcher) in a worker thread, so
+    the shared session, cookies and browser fallback behave exactly as in
+    sequential mode. on_result(index, url, html) is called as soon as each
+    page arrives.
+    """
+    fetch = fetch or (lambda index, url, required_ids: fetcher.get(url, required_ids))
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=concurrency))
+
+    total_slots = asyncio.Semaphore(concurrency)
+    host_slots = defaultdict(lambda: asyncio.Semaphore(per_host))
+    done = 0
+
+    async def fetch_one(index, url):
+        nonlocal done
+        async with total_slots, host_slots[host_of(url)]:
+            try:
+                html = await asyncio.to_thread(fetch, index, url, required_ids)
+            except Exception as e:
+                print(f"❌ Failed to fetch {url}: {e}")
+                html = None
+
+        done += 1
+        if on_result is not None:
+            on_result(index, url, html)
+        if done % 100 == 0 or done == len(urls):
+            print(f"⚡ Crawled {done}/{len(urls)} pages")
+        return html
+
+    # gather keeps input order regardless of completion order
+    return await asyncio.gather(*(fetch_one(i, url) for i, url in enumerate(urls)))
+
+
+def crawl(fetcher, urls, concurrency=CONCURRENCY, per_host=PER_HOST_LIMIT,
+          required_ids=(), on_result=None, fetch=None):
+    """Blocking wrapper around crawl_async for the scraper scripts."""
+    if not urls:
+        return []
+    return asyncio.run(crawl_async(fetcher, urls, concurrency, per_host, required_ids, on_result, fetch))
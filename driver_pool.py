@@ -0,0 +1,185 @@
+# pool of reusable headless Chrome workers shared across scrapers
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options
+from page_types import PAGE_LOAD_STRATEGY, block_requests
+
+try:
+    import psutil  # optional: enables the RSS-based recycling
+except ImportError:
+    psutil = None
+
+# --- Config ---
+POOL_SIZE = 4                 # Chrome instances kept alive
+MAX_PAGES_PER_DRIVER = 500    # recycle a driver after this many pages
+MAX_RSS_MB = 1500             # recycle a driver when Chrome's memory passes this
+PAGE_LOAD_TIMEOUT = 30        # seconds before driver.get gives up
+
+# ⚡ The "speed mode" flags from get_items_details.py
+SPEED_ARGUMENTS = [
+    "--log-level=3",
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--blink-settings=imagesEnabled=false",
+    "--disable-blink-features=AutomationControlled",
+    "--disable-features=NetworkService,NetworkServiceInProcess",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-sync",
+    "--window-size=1920,1080",
+]
+
+
+def chrome_options(headless=True, arguments=SPEED_ARGUMENTS):
+    """Build Chrome options with the shared speed flags."""
+    options = Options()
+    options.page_load_strategy = PAGE_LOAD_STRATEGY
+    if headless:
+        options.add_argument("--headless=new")
+    for argument in arguments:
+        options.add_argument(argument)
+    return options
+
+
+def new_driver(headless=True, arguments=SPEED_ARGUMENTS, page_load_timeout=PAGE_LOAD_TIMEOUT, page_type=None):
+    """Start one Chrome with the shared speed flags and page_type's request blocklist."""
+    driver = webdriver.Chrome(options=chrome_options(headless, arguments))
+    driver.set_page_load_timeout(page_load_timeout)
+    driver.set_script_timeout(page_load_timeout)
+    block_requests(driver, page_type)
+    return driver
+
+
+def driver_rss_mb(driver):
+    """Resident memory of chromedriver + all its Chrome processes, or None without psutil."""
+    if psutil is None:
+        return None
+    try:
+        root = psutil.Process(driver.service.process.pid)
+        processes = [root] + root.children(recursive=True)
+        return sum(p.memory_info().rss for p in processes if p.is_running()) / (1024 * 1024)
+    except (psutil.Error, AttributeError):
+        return None
+
+
+def is_alive(driver):
+    """True when the driver still answers commands (not crashed or hung)."""
+    try:
+        driver.execute_script("return 1")
+        return True
+    except WebDriverException:
+        return False
+
+
+class _Slot:
+    def __init__(self):
+        self.driver = None
+        self.pages = 0
+        self.broken = False
+
+
+class DriverPool:
+    """N reusable Chrome drivers handed out to worker threads.
+
+    Drivers start on first use (or all at once with eager=True) and are
+    restarted after max_pages pages, when their RSS passes max_rss_mb, or
+    when they crash/hang. page_type selects the request blocklist from
+    page_types.py.
+    """
+
+    def __init__(self, size=POOL_SIZE, max_pages=MAX_PAGES_PER_DRIVER, max_rss_mb=MAX_RSS_MB,
+                 headless=True, arguments=SPEED_ARGUMENTS, page_load_timeout=PAGE_LOAD_TIMEOUT, eager=False,
+                 page_type=None):
+        self.size = size
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.headless = headless
+        self.arguments = arguments
+        self.page_load_timeout = page_load_timeout
+        self.page_type = page_type
+        self.stats = {"started": 0, "recycled": 0, "crashed": 0}
+        self._stats_lock = threading.Lock()
+        self._slots = [_Slot() for _ in range(size)]
+        self._idle = queue.Queue()
+        for slot in self._slots:
+            if eager:
+                self._start(slot)
+            self._idle.put(slot)
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _start(self, slot):
+        slot.driver = new_driver(self.headless, self.arguments, self.page_load_timeout, self.page_type)
+        slot.pages = 0
+        slot.broken = False
+        self._count("started")
+
+    def _stop(self, slot):
+        if slot.driver is not None:
+            try:
+                slot.driver.quit()
+            except Exception:
+                pass  # already dead
+        slot.driver = None
+
+    def _needs_recycle(self, slot):
+        if slot.pages >= self.max_pages:
+            return f"served {slot.pages} pages"
+        rss = driver_rss_mb(slot.driver) if self.max_rss_mb else None
+        if rss is not None and rss > self.max_rss_mb:
+            return f"RSS {rss:.0f} MB"
+        return None
+
+    @contextmanager
+    def driver(self, timeout=None):
+        """Check out a healthy driver; it goes back to the pool on exit."""
+        slot = self._idle.get(timeout=timeout)
+        try:
+            if slot.driver is not None and not is_alive(slot.driver):
+                print("♻️ Restarting unresponsive Chrome worker")
+                self._count("crashed")
+                self._stop(slot)
+            if slot.driver is None:
+                self._start(slot)
+
+            try:
+                yield slot.driver
+            except WebDriverException:
+                print("♻️ Chrome worker crashed — it will be restarted")
+                self._count("crashed")
+                slot.broken = True
+                raise
+            finally:
+                slot.pages += 1
+
+            reason = self._needs_recycle(slot)
+            if reason:
+                print(f"♻️ Recycling Chrome worker ({reason})")
+                self._count("recycled")
+                self._stop(slot)
+        finally:
+            if slot.broken:
+                self._stop(slot)
+            self._idle.put(slot)
+
+    def map(self, fn, items):
+        """Run fn(driver, item) across the pool; results come back in input order."""
+        def run(item):
+            with self.driver() as driver:
+                return fn(driver, item)
+
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            return list(executor.map(run, items))
+
+    def close(self):
+        """Quit every driver in the pool."""
+        for slot in self._slots:
+            self._stop(slot)
+        print(f"🧹 Driver pool closed: {self.stats['started']} started, "
+              f"{self.stats['recycled']} recycled, {self.stats['crashed']} restarted after crashes")
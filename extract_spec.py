@@ -0,0 +1,123 @@
+# declarative extraction: field → (selector, attribute, regex, converter) specs, compiled once per entity type
+import os
+import re
+import soupsieve as sv
+
+# --- Shared patterns (compiled once for every extractor) ---
+ITEM_ID = re.compile(r"/item/(\d+)-")
+NPC_ID = re.compile(r"/npc/(\d+)-")
+QUEST_ID = re.compile(r"/quest/(\d+)-")
+SKILL_ID = re.compile(r"/skill/(\d+)-")
+SET_ID = re.compile(r"/set/(\d+)-")
+LEVEL = re.compile(r"Lv\.\s*(\d+)")
+
+
+def icon_name(src):
+    """Icon file name without folder and extension."""
+    return os.path.splitext(os.path.basename(src))[0]
+
+
+def label_cell(pattern):
+    """Scope: the <td> after the first <td> whose text matches pattern (the "Recipes" / "Set part" rows)."""
+    pattern = re.compile(pattern, re.I)
+
+    def scope(root):
+        label = root.find("td", string=pattern)
+        return label.find_next("td") if label else None
+    return scope
+
+
+class Field:
+    """One value: the first match of selector (or the element / its cell itself), as text or attribute.
+
+    regex keeps its group (default when it doesn't match), then convert
+    runs on anything that isn't None. default also stands in for a missing
+    element or attribute.
+    """
+
+    def __init__(self, selector=None, attr=None, sep="", strip=True, regex=None, group=1, convert=None,
+                 default=None, cell=None):
+        self.selector = sv.compile(selector) if selector else None
+        self.attr = attr
+        self.sep = sep
+        self.strip = strip
+        self.regex = re.compile(regex) if isinstance(regex, str) else regex
+        self.group = group
+        self.convert = convert
+        self.default = default
+        self.cell = cell
+
+    def __call__(self, el, cells=None):
+        if self.cell is not None:
+            el = cells[self.cell] if cells and self.cell < len(cells) else None
+        if el is not None and self.selector:
+            el = self.selector.select_one(el)
+        if el is None:
+            return self.default
+        if self.attr:
+            value = el.get(self.attr)
+            if value is None:
+                return self.default
+        else:
+            value = el.get_text(self.sep, strip=self.strip)
+        if self.regex:
+            m = self.regex.search(value)
+            if not m:
+                return self.default
+            value = m.group(self.group)
+        return self.convert(value) if self.convert and value is not None else value
+
+
+class Spec:
+    """Field name → Field / Rows / Record, read in order into one dict."""
+
+    def __init__(self, fields):
+        self.fields = list(fields.items())
+        self.uses_cells = any(getattr(field, "cell", None) is not None for _, field in self.fields)
+
+    def __call__(self, el, cells=None):
+        return {name: field(el, cells) for name, field in self.fields}
+
+
+class Rows:
+    """A repeated block (table rows, link lists): one dict per match of selector inside scope.
+
+    scope narrows the element first (a callable, e.g. label_cell, or None
+    for the element itself); cells keeps only rows with exactly that many
+    <td>s; keep(el) filters matches; finish(row) post-processes a row.
+    """
+
+    def __init__(self, selector, fields, scope=None, cells=None, keep=None, finish=None):
+        self.selector = sv.compile(selector)
+        self.spec = Spec(fields)
+        self.scope = scope
+        self.cells = cells
+        self.keep = keep
+        self.finish = finish
+
+    def __call__(self, el, cells=None):
+        scope = self.scope(el) if self.scope else el
+        if scope is None:
+            return []
+        rows = []
+        for match in self.selector.select(scope):
+            match_cells = match.find_all("td") if self.cells or self.spec.uses_cells else None
+            if self.cells and len(match_cells) != self.cells:
+                continue
+            if self.keep and not self.keep(match):
+                continue
+            row = self.spec(match, match_cells)
+            rows.append(self.finish(row) if self.finish else row)
+        return rows
+
+
+class Record:
+    """The first match of selector (or the element itself) as one dict, None without a match."""
+
+    def __init__(self, selector, fields):
+        self.selector = sv.compile(selector) if selector else None
+        self.spec = Spec(fields)
+
+    def __call__(self, el, cells=None):
+        match = self.selector.select_one(el) if self.selector else el
+        return self.spec(match) if match is not None else None
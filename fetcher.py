@@ -0,0 +1,239 @@
+# shared fetch engine: plain pooled HTTP first, Selenium only when a page needs JS
+import re
+import time
+import weakref
+import requests
+from requests.adapters import HTTPAdapter
+from rate_limiter import AdaptiveRateLimiter, is_rate_limited
+from page_types import wait_until_ready, print_ready_stats
+
+# --- Config ---
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/131.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+POOL_SIZE = 16        # keep-alive connections per host
+TIMEOUT = 15          # seconds per HTTP request
+MIN_HTML_SIZE = 2000  # smaller bodies are error stubs, not wiki pages
+MAX_RETRIES = 5       # retries per page after 429/503 responses
+
+
+def new_session(cookies=None, pool_size=POOL_SIZE):
+    """Create a requests session with a keep-alive connection pool."""
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if cookies:
+        add_cookies(session, cookies)
+    return session
+
+
+def add_cookies(session, cookies):
+    """Copy Selenium-style cookie dicts (driver.get_cookies()) into a session."""
+    for cookie in cookies:
+        session.cookies.set(
+            cookie["name"],
+            cookie["value"],
+            domain=cookie.get("domain"),
+            path=cookie.get("path", "/"),
+        )
+
+
+def has_element_ids(html, element_ids):
+    """True when every id in element_ids appears as an element id in html."""
+    for element_id in element_ids:
+        if not re.search(rf"""\bid=["']?{re.escape(element_id)}["'\s>]""", html):
+            return False
+    return True
+
+
+def response_text(resp):
+    """Decoded body of a wiki response (UTF-8 unless the server says otherwise)."""
+    # Pages are UTF-8; don't let requests guess ISO-8859-1 when charset is missing
+    if "charset" not in resp.headers.get("Content-Type", "").lower():
+        resp.encoding = "utf-8"
+    return resp.text
+
+
+def response_validators(resp):
+    """ETag / Last-Modified of a response, as stored in the cache for conditional GETs."""
+    validators = {}
+    if resp.headers.get("ETag"):
+        validators["etag"] = resp.headers["ETag"]
+    if resp.headers.get("Last-Modified"):
+        validators["last_modified"] = resp.headers["Last-Modified"]
+    return validators
+
+
+def needs_browser(html, required_ids=()):
+    """True when an HTTP body is missing what a rendered page would contain."""
+    if not html or len(html) < MIN_HTML_SIZE:
+        return True
+    return not has_element_ids(html, required_ids)
+
+
+class Fetcher:
+    """Fetch pages over a pooled HTTP session, falling back to Selenium.
+
+    Browser fallbacks are served by a driver_pool.DriverPool whose Chrome
+    workers start on first use, so runs that never need JavaScript never
+    start Chrome. Every request, HTTP or browser, goes through the shared
+    rate limiter.
+
+    With a page_type (see page_types.py) browser loads return as soon as the
+    page's ready selector appears instead of sleeping wait_time. With an
+    extractor (see js_extractors.py) browser fallbacks return the script's
+    JSON dict instead of page_source.
+    """
+
+    def __init__(self, driver_pool=None, cookies=None, wait_time=0.5, timeout=TIMEOUT, limiter=None,
+                 page_type=None, extractor=None, extractor_args=()):
+        self.session = new_session(cookies)
+        self.limiter = limiter or AdaptiveRateLimiter()
+        self.driver_pool = driver_pool
+        self.wait_time = wait_time
+        self.timeout = timeout
+        self.page_type = page_type
+        self.extractor = extractor
+        self.extractor_args = extractor_args
+        self.stats = {"http": 0, "browser": 0, "not_modified": 0}
+        self._drivers_with_cookies = weakref.WeakSet()
+
+    def get_http_response(self, url, headers=None):
+        """Return the final response for url after 429/503 retries, or None on network errors."""
+        for attempt in range(MAX_RETRIES + 1):
+            self.limiter.acquire()
+            try:
+                resp = self.session.get(url, timeout=self.timeout, headers=headers)
+            except requests.RequestException as e:
+                print(f"⚠️ HTTP fetch failed for {url}: {e}")
+                return None
+
+            if not self.limiter.on_response(resp.status_code, resp.headers.get("Retry-After")):
+                return resp
+        print(f"❌ Still rate limited after {MAX_RETRIES} retries: {url}")
+        return None
+
+    def get_http(self, url):
+        """Return the HTML body for url, or None on network/HTTP errors."""
+        resp = self.get_http_response(url)
+        if resp is None:
+            return None
+        if resp.status_code != 200:
+            print(f"⚠️ HTTP {resp.status_code} for {url}")
+            return None
+        return response_text(resp)
+
+    def get(self, url, required_ids=()):
+        """Fetch url over HTTP; use the browser only if the body looks incomplete."""
+        html = self.get_http(url)
+        if html is not None and not needs_browser(html, required_ids):
+            self.stats["http"] += 1
+            return html
+
+        if self.driver_pool is None:
+            return html
+
+        print(f"🧭 Falling back to browser: {url}")
+        return self.get_with_browser(url)
+
+    def conditional_get(self, url, required_ids=(), validators=None):
+        """Like get(), but sends the cached page's validators and reports what came back.
+
+        Returns (status, body, validators): (304, None, validators) when the
+        page is unchanged, (200, body, new validators) for a fresh body, or
+        (None, None, {}) when nothing usable was fetched. Browser fallbacks
+        carry no validators.
+        """
+        headers = {}
+        if validators and validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators and validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+        resp = self.get_http_response(url, headers=headers or None)
+        if resp is not None and resp.status_code == 304:
+            self.stats["not_modified"] += 1
+            return 304, None, response_validators(resp) or validators
+        html = None
+        if resp is not None:
+            if resp.status_code == 200:
+                html = response_text(resp)
+            else:
+                print(f"⚠️ HTTP {resp.status_code} for {url}")
+        if html is not None and not needs_browser(html, required_ids):
+            self.stats["http"] += 1
+            return 200, html, response_validators(resp)
+
+        if self.driver_pool is not None:
+            print(f"🧭 Falling back to browser: {url}")
+            html = self.get_with_browser(url)
+        return (200, html, {}) if html is not None else (None, None, {})
+
+    def get_with_browser(self, url):
+        """Load url in a pooled Selenium driver; return page_source (or the extractor's dict)."""
+        with self.driver_pool.driver() as driver:
+            if driver not in self._drivers_with_cookies:
+                self._copy_cookies_to_driver(driver, url)
+                self._drivers_with_cookies.add(driver)
+
+            for attempt in range(MAX_RETRIES + 1):
+                self.limiter.acquire()
+                try:
+                    driver.get(url)
+                except Exception as e:
+                    print(f"⚠️ Timeout loading {url}: {e}")
+                if self.page_type:
+                    wait_until_ready(driver, self.page_type)
+                else:
+                    time.sleep(self.wait_time)
+                if self.extractor:
+                    # Only the title crosses WebDriver until the page is usable
+                    throttled = "429" in (driver.title or "")
+                else:
+                    html = driver.page_source
+                    throttled = is_rate_limited(html)
+
+                if not throttled:
+                    self.limiter.on_success()
+                    break
+                self.limiter.on_throttle()
+
+            self.stats["browser"] += 1
+            if self.extractor:
+                if throttled:
+                    return None
+                return driver.execute_script(self.extractor, *self.extractor_args)
+            return html
+
+    def _copy_cookies_to_driver(self, driver, url):
+        """Give the browser the same server/chronicle context as the HTTP session."""
+        if not self.session.cookies:
+            return
+        # add_cookie only works once the driver is on the cookie's domain
+        base = "/".join(url.split("/")[:3])
+        driver.get(base)
+        for cookie in self.session.cookies:
+            try:
+                driver.add_cookie({"name": cookie.name, "value": cookie.value, "path": cookie.path or "/"})
+            except Exception as e:
+                print(f"⚠️ Skipped cookie {cookie.name}: {e}")
+
+    def close(self):
+        """Quit the fallback browsers (if started) and close the HTTP pool."""
+        if self.driver_pool is not None:
+            self.driver_pool.close()
+            print_ready_stats()
+        self.session.close()
+        print(
+            f"📈 Fetch stats: {self.stats['http']} via HTTP, {self.stats['browser']} via browser, "
+            f"{self.stats['not_modified']} not modified, "
+            f"{self.limiter.stats['throttled']} throttled, final rate {self.limiter.current_rate:.2f} req/s"
+        )
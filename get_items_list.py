@@ -18,55 +18,18 @@ CHRONICLE_NAME = SERVER_NAMES.get(SERVER_ID, f"server_{SERVER_ID}").lower()
 # --- Setup Selenium ---
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from bs4 import BeautifulSoup
 import time, re, pandas as pd, csv, sys
-
-options = Options()
-# options.add_argument("--headless")
-options.add_argument("--window-size=1920,1080")
-driver = webdriver.Chrome(options=options)
-wait = WebDriverWait(driver, 15)
+from server_switch import SERVER_NAMES as SWITCH_CHRONICLES, apply_to_driver
 
 # ✅ Collect items here
 all_items = []
 
-# --- STEP 1: Open item search page ---
-print("🌐 Opening item search page...")
-driver.get(START_URL)
-wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "table tbody tr")))
-time.sleep(1)
-
-# --- STEP 2: Switch server with CSRF POST ---
-print("🔄 Switching server...")
-csrf_token = driver.execute_script(
-    "return document.querySelector('meta[name=\"csrf-token\"]').getAttribute('content');"
-)
-driver.execute_script(
-    """
-    fetch('/wiki/profile/set-server', {
-        method: 'POST',
-        headers: {
-            'Content-Type': 'application/x-www-form-urlencoded',
-            'X-CSRF-Token': arguments[0]
-        },
-        body: '_csrf=' + encodeURIComponent(arguments[0]) + '&server_id=' + arguments[1]
-    }).then(() => location.reload());
-    """,
-    csrf_token,
-    SERVER_ID
-)
-time.sleep(4)
-print("✅ Server switched successfully.")
-
-# ✅ Save cookies before restarting browser
-cookies = driver.get_cookies()
-
-# --- STEP 3: Restart browser in speed mode ---
-driver.quit()
+# --- STEP 1: Start browser in speed mode ---
 options = Options()
+# options.add_argument("--headless")
+options.add_argument("--window-size=1920,1080")
 options.add_argument("--disable-dev-shm-usage")
 options.add_argument("--blink-settings=imagesEnabled=false")
 options.add_argument("--disable-blink-features=AutomationControlled")
@@ -76,17 +39,13 @@ options.add_argument("--disable-background-networking")
 options.add_argument("--disable-sync")
 
 driver = webdriver.Chrome(options=options)
-driver.get(START_URL)
-
-# ✅ Restore session cookies
-for cookie in cookies:
-    driver.add_cookie(cookie)
+wait = WebDriverWait(driver, 15)
 
-driver.get(START_URL)
-time.sleep(2)
+# --- STEP 2: Switch server over HTTP (cookie jar reused from cache/cookies/) ---
+apply_to_driver(driver, SWITCH_CHRONICLES[SERVER_ID], BASE_URL)
 print("⚡ Speed-optimized scraping session started.")
 
-# --- STEP 4: Scrape pages ---
+# --- STEP 3: Scrape pages ---
 for page in range(1, MAX_PAGES + 1):
     url = f"{BASE_URL}/search?query=&type=item&sub[levelMin]=1&sub[levelMax]=99&sub[race]=&limit={LIMIT}&page={page}"
     print(f"📄 Scraping page {page}/{MAX_PAGES}: {url}")
@@ -160,7 +119,7 @@ for page in range(1, MAX_PAGES + 1):
         print(f"⏱️ Waiting {WAIT_TIME}s before next page...")
         time.sleep(WAIT_TIME)
 
-# --- STEP 5: Save TSV ---
+# --- STEP 4: Save TSV ---
 if not all_items:
     print("⚠️ No items collected. Exiting.")
     driver.quit()
@@ -170,7 +129,7 @@ df = pd.DataFrame(all_items, columns=["id", "name", "icon", "grade", "link", "ch
 df.to_csv(OUTPUT_FILE, sep="\t", index=False, quoting=csv.QUOTE_MINIMAL)
 print(f"\n💾 Saved {len(df)} items to {OUTPUT_FILE}")
 
-# --- STEP 6: Optional GUI view ---
+# --- STEP 5: Optional GUI view ---
 try:
     from pandasgui import show
     print("📊 Opening GUI...")
@@ -178,7 +137,7 @@ try:
 except ImportError:
     print("⚠️ pandasgui not installed. Install it with: pip install pandasgui")
 
-# --- STEP 7: Pause before exit ---
+# --- STEP 6: Pause before exit ---
 input("\n✅ Scraping complete. Press Enter to exit...")
 
 driver.quit()
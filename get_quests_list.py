@@ -1,9 +1,9 @@
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from bs4 import BeautifulSoup
-import time
 import pandas as pd
 import csv
+from page_types import PAGE_LOAD_STRATEGY, wait_until_ready
 import re
 
 # --- Config ---
@@ -16,6 +16,7 @@ OUTPUT_FILE = f"data/quests_list.tsv"
 
 # --- Setup Selenium ---
 options = Options()
+options.page_load_strategy = PAGE_LOAD_STRATEGY
 # options.add_argument("--headless")  # ❌ uncomment if you want headless
 options.add_argument("--log-level=3")
 options.add_argument("--no-sandbox")
@@ -34,7 +35,7 @@ driver = webdriver.Chrome(options=options)
 # --- Open page ---
 print(f"🌐 Loading page: {INPUT_URL}")
 driver.get(INPUT_URL)
-time.sleep(3)  # wait for content to load
+wait_until_ready(driver, "quest_list")  # returns as soon as the list is rendered
 
 # --- Parse HTML ---
 soup = BeautifulSoup(driver.page_source, "html.parser")
@@ -1,14 +1,13 @@
 # races classes step 1: get races and subtypes list
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from bs4 import BeautifulSoup
 import pandas as pd
 import re
-import time
 import argparse
+from server_switch import SERVER_NAMES as SWITCH_CHRONICLES, apply_to_driver
+from page_types import PAGE_LOAD_STRATEGY, wait_until_ready
 
 # --- Config ---
 BASE_URL = "https://wikipedia1.mw2.wiki"
@@ -43,66 +42,19 @@ def clean_url(url: str) -> str:
     return re.sub(r'\?.*$', '', url)
 
 def switch_server(driver, wait, server_id, chronicle):
-    """Switch server and chronicle using CSRF-protected POST requests."""
-    print(f"🔄 Switching to server {server_id} ({chronicle})...")
-
-    # Get CSRF token
-    csrf_token = driver.execute_script("""
-        const meta = document.querySelector('meta[name="csrf-token"]');
-        return meta ? meta.getAttribute('content') : null;
-    """)
-
-    if not csrf_token:
-        print("❌ CSRF token not found. Make sure you're logged in or on the main wiki page.")
-        return False
-
-    # Execute JavaScript that performs both POSTs synchronously and waits for responses
-    driver.execute_script("""
-        const csrf = arguments[0];
-        const serverId = arguments[1];
-        const chronicle = arguments[2];
-        async function switchSettings() {
-            const postData = async (url, body) => {
-                const resp = await fetch(url, {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/x-www-form-urlencoded',
-                        'X-CSRF-Token': csrf
-                    },
-                    body
-                });
-                return resp.ok;
-            };
-
-            console.log('🛰 Sending POSTs to update server and chronicle...');
-            const s1 = await postData('/wiki/profile/set-server', '_csrf=' + encodeURIComponent(csrf) + '&server_id=' + serverId);
-            const s2 = await postData('/wiki/profile/set-chronicles', '_csrf=' + encodeURIComponent(csrf) + '&chronicle=' + chronicle);
-            console.log('Server POST:', s1, 'Chronicle POST:', s2);
-
-            if (s1 && s2) {
-                console.log('✅ Both POSTs succeeded. Reloading...');
-                location.reload();
-            } else {
-                console.error('❌ Failed to switch one or both settings.');
-            }
-        }
-        switchSettings();
-    """, csrf_token, server_id, chronicle)
-
-    # Wait for reload and confirmation of switch
+    """Switch server and chronicle over HTTP and load the saved cookie jar into the browser."""
     try:
-        print("⏳ Waiting for page reload...")
-        time.sleep(4)
-        wait.until(lambda d: chronicle.lower() in d.page_source.lower())
+        apply_to_driver(driver, SWITCH_CHRONICLES.get(server_id, chronicle), BASE_URL)
         print(f"✅ Switched successfully to server {server_id} ({chronicle}).")
         return True
-    except Exception:
-        print("⚠️ Switch may not have taken effect.")
+    except Exception as e:
+        print(f"⚠️ Switch may not have taken effect: {e}")
         return False
 
 
 # --- Setup Selenium ---
 options = Options()
+options.page_load_strategy = PAGE_LOAD_STRATEGY
 # options.add_argument("--headless")  # Uncomment for headless mode
 options.add_argument("--log-level=3")
 options.add_argument("--no-sandbox")
@@ -120,8 +72,7 @@ wait = WebDriverWait(driver, 10)
 # --- STEP 1: Open page ---
 print(f"🌐 Opening races page ({CHRONICLE})...")
 driver.get(INPUT_URL)
-wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div#races-row")))
-time.sleep(1)
+wait_until_ready(driver, "races")
 
 # --- STEP 2: Switch server + chronicle ---
 switch_server(driver, wait, SERVER_ID, CHRONICLE)
@@ -129,8 +80,7 @@ switch_server(driver, wait, SERVER_ID, CHRONICLE)
 # --- STEP 3: Reload the page after switch ---
 print("🔁 Reloading page after context switch...")
 driver.get(f"{INPUT_URL}?chronicles={CHRONICLE}")
-wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div#races-row")))
-time.sleep(1)
+wait_until_ready(driver, "races")
 
 # --- STEP 4: Parse data ---
 print("🔍 Parsing races and subtypes...")
@@ -1,11 +1,11 @@
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from bs4 import BeautifulSoup
-import time
 import pandas as pd
 import csv
 import re
 import os
+from page_types import PAGE_LOAD_STRATEGY, wait_until_ready
 
 # --- Config ---
 PAGE = 1
@@ -21,6 +21,7 @@ OUTPUT_FILE = "data/recipes/recipes_list.tsv"
 
 # --- Setup Selenium ---
 options = Options()
+options.page_load_strategy = PAGE_LOAD_STRATEGY
 # options.add_argument("--headless")  # ✅ enable for headless scraping
 options.add_argument("--log-level=3")
 options.add_argument("--no-sandbox")
@@ -36,7 +37,7 @@ driver = webdriver.Chrome(options=options)
 
 print(f"🔍 Loading: {INPUT_URL}")
 driver.get(INPUT_URL)
-time.sleep(2)  # wait for JS rendering
+wait_until_ready(driver, "recipe_list")  # returns as soon as JS has rendered the table
 
 html = driver.page_source
 soup = BeautifulSoup(html, "html.parser")
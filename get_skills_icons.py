@@ -1,15 +1,15 @@
 # --- Config ---
 import os
-import time
 import pandas as pd
 import requests
 from urllib.parse import urljoin
+from rate_limiter import AdaptiveRateLimiter
 
 INPUT_FILE = "data/skills/skills_list_eternal.tsv"
 ICON_BASE_URL = "https://wikipedia1.mw2.wiki/icon64/"
 SAVE_DIR = "data/skills/icons"
 
-WAIT_TIME = 0.5        # Wait between attempts
+WAIT_TIME = 0.5        # Starting delay between downloads (rate limiter adapts it)
 LIMIT = 1009999            # Default number of skills to process
 OFFSET = 0             # Start row index
 RETRY_COUNT = 3        # Retry count per icon
@@ -23,6 +23,9 @@ HEADERS = {
     "Accept": "image/webp,image/apng,image/*,*/*;q=0.8",
 }
 
+# Shared rate limiter: ramps up while the CDN is healthy, backs off on 429/503
+limiter = AdaptiveRateLimiter(rate=1 / WAIT_TIME)
+
 # --------------------------------------------------------
 # Ensure output directory exists
 # --------------------------------------------------------
@@ -71,8 +74,14 @@ def download_icon(icon_name: str):
 
     for attempt in range(1, RETRY_COUNT + 1):
         try:
+            limiter.acquire()
             r = requests.get(url, headers=HEADERS, timeout=10)
 
+            if limiter.on_response(r.status_code, r.headers.get("Retry-After")):
+                print(f"🐢 HTTP {r.status_code} for {filename} "
+                      f"(attempt {attempt}/{RETRY_COUNT})")
+                continue
+
             if r.status_code == 200:
                 with open(save_path, "wb") as f:
                     f.write(r.content)
@@ -86,13 +95,6 @@ def download_icon(icon_name: str):
             print(f"❌ Error downloading {filename} "
                   f"(attempt {attempt}/{RETRY_COUNT}): {e}")
 
-        # Retry delay (except last attempt)
-        if attempt < RETRY_COUNT:
-            time.sleep(WAIT_TIME)
-
-    # Global sleep between icons
-    time.sleep(WAIT_TIME)
-
 
 # --------------------------------------------------------
 # Main loop
@@ -25,48 +25,15 @@ from selenium.webdriver.support import expected_conditions as EC
 from bs4 import BeautifulSoup
 import time, re, os, pandas as pd, csv
 from pathlib import Path
-
-options = Options()
-# options.add_argument("--headless")
-options.add_argument("--window-size=1920,1080")
-driver = webdriver.Chrome(options=options)
-wait = WebDriverWait(driver, 15)
+from server_switch import SERVER_NAMES as SWITCH_CHRONICLES, apply_to_driver
 
 # ✅ Collect skills here
 all_skills = []
 
-# --- STEP 1: Open skill search page ---
-print("🌐 Opening skill search page...")
-driver.get(START_URL)
-time.sleep(1)
-
-# --- STEP 2: Switch server with CSRF POST ---
-csrf_token = driver.execute_script(
-    "return document.querySelector('meta[name=\"csrf-token\"]').getAttribute('content');"
-)
-driver.execute_script(
-    """
-    fetch('/wiki/profile/set-server', {
-        method: 'POST',
-        headers: {
-            'Content-Type': 'application/x-www-form-urlencoded',
-            'X-CSRF-Token': arguments[0]
-        },
-        body: '_csrf=' + encodeURIComponent(arguments[0]) + '&server_id=' + arguments[1]
-    }).then(() => location.reload());
-    """,
-    csrf_token,
-    SERVER_ID
-)
-time.sleep(4)
-print("✅ Server switched successfully.")
-
-# ✅ Save cookies before restarting browser
-cookies = driver.get_cookies()
-
-# 🔄 Restart browser with SPEED mode
-driver.quit()
+# --- STEP 1: Start browser in SPEED mode ---
 options = Options()
+# options.add_argument("--headless")
+options.add_argument("--window-size=1920,1080")
 options.add_argument("--disable-dev-shm-usage")
 options.add_argument("--blink-settings=imagesEnabled=false")
 options.add_argument("--disable-blink-features=AutomationControlled")
@@ -76,16 +43,10 @@ options.add_argument("--disable-background-networking")
 options.add_argument("--disable-sync")
 
 driver = webdriver.Chrome(options=options)
-# ✅ 1. Open the base domain first (NOT the search page)
-driver.get(BASE_URL)
-time.sleep(1)
-
-# ✅ 2. Add cookies now (domain matches)
-for cookie in cookies:
-    try:
-        driver.add_cookie(cookie)
-    except Exception as e:
-        print(f"⚠️ Skipped cookie {cookie.get('name')}: {e}")
+wait = WebDriverWait(driver, 15)
+
+# --- STEP 2: Switch server over HTTP (cookie jar reused from cache/cookies/) ---
+apply_to_driver(driver, SWITCH_CHRONICLES[SERVER_ID], BASE_URL)
 
 # --- STEP 3: Scrape each page ---
 for page in range(1, MAX_PAGES + 1):
@@ -0,0 +1,850 @@
+# content-addressed HTML cache shared by every scraper: canonical URL + chronicle → body
+import glob
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
+import sqlite3
+import tarfile
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from page_types import trim_page, trim_types, validate_page
+from wiki_urls import entity_key
+
+try:
+    import zstandard as zstd  # optional: smaller objects, dictionary trained on our own pages
+except ImportError:
+    zstd = None
+
+# --- Config ---
+CACHE_ROOT = "cache/store"
+BACKEND = "dir"               # "dir" = one file per page, "sqlite" = single packed cache.sqlite
+SQLITE_FILE = "cache.sqlite"  # inside CACHE_ROOT
+MANIFEST_FILE = "manifest.jsonl"  # inside CACHE_ROOT: append-only log of every ref ("dir" backend)
+COMPRESSION = "zstd"          # "zstd" (falls back to gzip without zstandard), "gzip" or "none"
+ZSTD_LEVEL = 10
+GZIP_LEVEL = 6
+DICT_DIR = "dicts"            # inside CACHE_ROOT: trained zstd dictionaries, <dict_id>.zdict
+DICT_SIZE = 112 * 1024        # bytes per trained dictionary
+DICT_SAMPLES = 2000           # cached pages sampled for training
+QUARANTINE_DIR = "quarantine" # inside CACHE_ROOT: rejected bodies, kept for inspection only
+MAX_BYTES = None              # cap on stored objects (e.g. 20 * 1024**3); least recently used pages go first
+EVICT_TO = 0.9                # evict down to this fraction of MAX_BYTES
+TOUCH_INTERVAL = 3600         # seconds; a hit rewrites last_used at most this often
+TRIM = False                  # store only page_types.REGIONS of each page instead of the whole body
+COLD_ROOT = None              # with TRIM: also keep full bodies in a second store here (e.g. "cache/cold")
+
+# Page type → days a cached page stays fresh; stale pages count as misses and get refetched
+TTL_DAYS = {
+    "item": 30,
+    "skill": 30,
+    "npc": 7,      # drop lists change with patches
+    "quest": 30,
+    "recipe": 30,
+    "class": 30,
+    "class_skills": 30,
+    "class_level": 30,
+    "class_summary": 30,
+}
+DEFAULT_TTL_DAYS = None       # page types not listed above (and untyped pages) never expire
+
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def canonical_url(url: str) -> str:
+    """Normalize a page URL so the same page always maps to the same key."""
+    parts = urlsplit(url.strip())
+    path = parts.path.rstrip("/") or "/"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme.lower() or "https", parts.netloc.lower(), path, query, ""))
+
+
+def content_hash(html: str) -> str:
+    return hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+
+def _write_atomic(path, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)  # readers never see half a file
+
+
+def _valid_ref(ref):
+    """True when a ref from a bundle is safe to store: its hash and chronicle become file names."""
+    return (
+        isinstance(ref, dict)
+        and isinstance(ref.get("url"), str)
+        and isinstance(ref.get("chronicle"), str) and re.fullmatch(r"[\w-]+", ref["chronicle"]) is not None
+        and isinstance(ref.get("variant", ""), str)
+        and isinstance(ref.get("hash"), str) and re.fullmatch(r"[0-9a-f]{64}", ref["hash"]) is not None
+        and isinstance(ref.get("fetched_at"), (int, float))
+    )
+
+
+class Codec:
+    """Compress stored objects; read any of zstd (with or without dictionary), gzip or plain HTML.
+
+    The format is recognized from the object's magic bytes, so stores
+    written with another COMPRESSION setting (or before compression
+    existed) stay readable. zstd frames carry their dictionary id; every
+    dictionary ever trained is kept under DICT_DIR and the newest one is
+    used for new objects.
+    """
+
+    def __init__(self, root, compression=COMPRESSION):
+        if compression == "zstd" and zstd is None:
+            print("⚠️ zstandard not installed — compressing the HTML cache with gzip (pip install zstandard)")
+            compression = "gzip"
+        self.compression = compression
+        self.dict_dir = os.path.join(root, DICT_DIR)
+        self.dicts = {}      # dict_id → ZstdCompressionDict
+        self.current = None  # dictionary used for new objects
+        if zstd is not None:
+            self._load_dicts()
+
+    def _load_dicts(self):
+        paths = sorted(glob.glob(os.path.join(self.dict_dir, "*.zdict")), key=os.path.getmtime)
+        for path in paths:
+            with open(path, "rb") as f:
+                d = zstd.ZstdCompressionDict(f.read())
+            self.dicts[d.dict_id()] = d
+            self.current = d
+
+    def encode(self, data: bytes) -> bytes:
+        if self.compression == "zstd":
+            if self.current is not None:
+                return zstd.ZstdCompressor(level=ZSTD_LEVEL, dict_data=self.current).compress(data)
+            return zstd.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+        if self.compression == "gzip":
+            return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+        return data
+
+    def decode(self, data: bytes):
+        """Plain bytes of a stored object, or None if it can't be decompressed here."""
+        if data.startswith(ZSTD_MAGIC):
+            if zstd is None:
+                print("⚠️ Cached object is zstd-compressed but zstandard is not installed")
+                return None
+            dict_id = zstd.get_frame_parameters(data).dict_id
+            if dict_id and dict_id not in self.dicts:
+                print(f"⚠️ Missing zstd dictionary {dict_id} in {self.dict_dir}")
+                return None
+            dctx = zstd.ZstdDecompressor(dict_data=self.dicts[dict_id]) if dict_id else zstd.ZstdDecompressor()
+            return dctx.decompress(data)
+        if data.startswith(GZIP_MAGIC):
+            return gzip.decompress(data)
+        return data
+
+    def train(self, samples, size=DICT_SIZE):
+        """Train a zstd dictionary on sample pages, save it and use it for new objects."""
+        if zstd is None:
+            raise RuntimeError("Training a dictionary needs zstandard (pip install zstandard)")
+        d = zstd.train_dictionary(size, samples)
+        _write_atomic(os.path.join(self.dict_dir, f"{d.dict_id()}.zdict"), d.as_bytes())
+        self.dicts[d.dict_id()] = d
+        self.current = d
+        return d.dict_id()
+
+
+class DirectoryBackend:
+    """objects/<aa>/<sha256>.html + refs/<chronicle>/<aa>/<key>.json under root.
+
+    Every ref write is also appended to MANIFEST_FILE, so the whole index
+    loads from one file; it is rebuilt from the ref files if missing.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.manifest_path = os.path.join(root, MANIFEST_FILE)
+        self._manifest_lock = threading.Lock()
+
+    def _append_manifest(self, key, ref):
+        os.makedirs(self.root, exist_ok=True)
+        with self._manifest_lock, open(self.manifest_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"key": key, "ref": ref}) + "\n")
+
+    def _ref_path(self, chronicle, key):
+        return os.path.join(self.root, "refs", str(chronicle), key[:2], f"{key}.json")
+
+    def _object_path(self, digest):
+        return os.path.join(self.root, "objects", digest[:2], f"{digest}.html")
+
+    def read_ref(self, chronicle, key):
+        path = self._ref_path(chronicle, key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"⚠️ Ignoring unreadable cache ref {path}: {e}")
+            return None
+
+    def write_ref(self, chronicle, key, ref):
+        _write_atomic(self._ref_path(chronicle, key), json.dumps(ref).encode("utf-8"))
+        self._append_manifest(key, ref)
+
+    def has_object(self, digest):
+        return os.path.exists(self._object_path(digest))
+
+    def read_object(self, digest):
+        try:
+            with open(self._object_path(digest), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def write_object(self, digest, data: bytes):
+        _write_atomic(self._object_path(digest), data)
+
+    def delete_ref(self, chronicle, key):
+        try:
+            os.remove(self._ref_path(chronicle, key))
+        except FileNotFoundError:
+            pass
+        self._append_manifest(key, None)
+
+    def delete_object(self, digest):
+        try:
+            os.remove(self._object_path(digest))
+        except FileNotFoundError:
+            pass
+
+    def iter_objects(self):
+        """Yield (hash, stored size) of every object."""
+        objects_dir = os.path.join(self.root, "objects")
+        for dir_path, _, files in os.walk(objects_dir):
+            for fname in files:
+                if fname.endswith(".html"):
+                    yield fname[:-len(".html")], os.path.getsize(os.path.join(dir_path, fname))
+
+    def _walk_refs(self):
+        refs_dir = os.path.join(self.root, "refs")
+        for dir_path, _, files in os.walk(refs_dir):
+            for fname in files:
+                if fname.endswith(".json"):
+                    with open(os.path.join(dir_path, fname), "r", encoding="utf-8") as f:
+                        yield fname[:-len(".json")], json.load(f)
+
+    def _write_manifest(self, refs):
+        lines = "".join(json.dumps({"key": key, "ref": ref}) + "\n" for key, ref in refs.items())
+        with self._manifest_lock:
+            _write_atomic(self.manifest_path, lines.encode("utf-8"))
+
+    def iter_refs(self):
+        """Yield (key, ref) from the manifest (one file read), rebuilding or compacting it as needed."""
+        if not os.path.exists(self.manifest_path):
+            refs = dict(self._walk_refs())
+            if refs:
+                print(f"🗂 Building cache manifest from {len(refs)} ref files...")
+                self._write_manifest(refs)
+            yield from refs.items()
+            return
+
+        refs = {}
+        lines = 0
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn last line of an interrupted run
+                lines += 1
+                if entry["ref"] is None:
+                    refs.pop(entry["key"], None)
+                else:
+                    refs[entry["key"]] = entry["ref"]
+        if lines > 2 * len(refs) + 1000:
+            self._write_manifest(refs)  # drop superseded lines
+        yield from refs.items()
+
+    def close(self):
+        pass
+
+
+class SqliteBackend:
+    """Single-file packed store: refs and objects are rows of one SQLite database."""
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS refs (key TEXT PRIMARY KEY, chronicle TEXT, ref TEXT)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS objects (hash TEXT PRIMARY KEY, body BLOB)")
+        self._db.commit()
+
+    def read_ref(self, chronicle, key):
+        with self._lock:
+            row = self._db.execute("SELECT ref FROM refs WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def write_ref(self, chronicle, key, ref):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO refs (key, chronicle, ref) VALUES (?, ?, ?)",
+                (key, str(chronicle), json.dumps(ref)),
+            )
+            self._db.commit()
+
+    def has_object(self, digest):
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM objects WHERE hash = ?", (digest,)).fetchone() is not None
+
+    def read_object(self, digest):
+        with self._lock:
+            row = self._db.execute("SELECT body FROM objects WHERE hash = ?", (digest,)).fetchone()
+        return bytes(row[0]) if row else None
+
+    def write_object(self, digest, data: bytes):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO objects (hash, body) VALUES (?, ?)", (digest, data))
+            self._db.commit()
+
+    def delete_ref(self, chronicle, key):
+        with self._lock:
+            self._db.execute("DELETE FROM refs WHERE key = ?", (key,))
+            self._db.commit()
+
+    def delete_object(self, digest):
+        with self._lock:
+            self._db.execute("DELETE FROM objects WHERE hash = ?", (digest,))
+            self._db.commit()
+
+    def iter_objects(self):
+        with self._lock:
+            rows = self._db.execute("SELECT hash, length(body) FROM objects").fetchall()
+        yield from rows
+
+    def iter_refs(self):
+        with self._lock:
+            rows = self._db.execute("SELECT key, ref FROM refs").fetchall()
+        for key, ref in rows:
+            yield key, json.loads(ref)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def open_backend(kind=BACKEND, root=CACHE_ROOT):
+    """Return the storage backend called kind ("dir" or "sqlite") under root."""
+    if kind == "dir":
+        return DirectoryBackend(root)
+    if kind == "sqlite":
+        return SqliteBackend(os.path.join(root, SQLITE_FILE))
+    raise ValueError(f"Unknown cache backend '{kind}' (expected 'dir' or 'sqlite')")
+
+
+def covers(ref, page_type):
+    """True unless ref's body was trimmed to regions that may lack page_type's."""
+    trimmed = ref.get("trimmed")
+    if not trimmed or not page_type:
+        return True
+    types = trimmed if isinstance(trimmed, list) else [ref.get("page_type")]  # older refs: True
+    return page_type in types
+
+
+class CacheReader:
+    """Read-only access to the bodies of a store, without loading its refs.
+
+    What HtmlCache.locate hands out is enough to read a page here, so
+    worker processes (reparse.py) open one each and read and decompress
+    their own pages.
+    """
+
+    def __init__(self, root=CACHE_ROOT, backend=BACKEND, compression=COMPRESSION):
+        self.root = root
+        self.backend = open_backend(backend, root) if isinstance(backend, str) else backend
+        self.codec = Codec(root, compression)
+
+    def read(self, ref):
+        """Body of a ref (as returned by meta or iter_pages), or None if its object is missing."""
+        data = self.backend.read_object(ref["hash"])
+        if data is not None:
+            data = self.codec.decode(data)
+        return data.decode("utf-8") if data is not None else None
+
+    def read_source(self, source):
+        """Body of a locate() result, or None if it is gone or (an old cache file) not a valid page."""
+        if source[0] == "ref":
+            return self.read(source[1])
+        _, path, page_type = source
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                html = f.read()
+        except OSError as e:
+            print(f"⚠️ Could not read {path}: {e}")
+            return None
+        reason = validate_page(html, page_type) if page_type else None
+        if reason:
+            print(f"⚠️ Skipping {path}: {reason}")
+            return None
+        return html
+
+    def close(self):
+        self.backend.close()
+
+
+class HtmlCache(CacheReader):
+    """One HTML cache for all scrapers.
+
+    Bodies are stored once under their SHA-256, and each canonical URL +
+    chronicle (+ optional variant, e.g. a clicked tab) has a small ref
+    recording the hash, fetch time, status and size. Storage is a directory
+    tree or a single SQLite file (BACKEND); the API is the same. Objects are
+    compressed (COMPRESSION) and decompressed transparently. Old per-script
+    cache files are imported on first read via legacy_path.
+
+    Bodies are validated before they are stored (page_types.validate_page):
+    error pages, 429 pages, stubs and pages missing their page type's
+    selector go to QUARANTINE_DIR instead of the cache.
+
+    Refs remember their page type, so a page older than TTL_DAYS[page_type]
+    is stale and read as a miss. With MAX_BYTES set, the least recently
+    used pages are evicted whenever the store grows past it.
+
+    With trim=True only the regions registered for the page type are kept
+    (page_types.REGIONS, for every page type sharing the key); the full body
+    can go to a cold store at cold_root. A trimmed body is a miss for page
+    types its ref doesn't list.
+    """
+
+    def __init__(self, root=CACHE_ROOT, backend=BACKEND, compression=COMPRESSION, max_bytes=MAX_BYTES,
+                 trim=TRIM, cold_root=COLD_ROOT):
+        super().__init__(root, backend, compression)
+        self.max_bytes = max_bytes
+        self.trim = trim
+        self.cold = HtmlCache(cold_root, backend, compression, trim=False, cold_root=None) if trim and cold_root else None
+        # The manifest: every ref, loaded once, so lookups never touch the disk
+        self._refs_lock = threading.Lock()
+        self.refs = dict(self.backend.iter_refs())
+        self._rekey()
+        self._legacy_dirs = {}  # old cache folder → names of its files, listed once
+        self.stats = {"hits": 0, "misses": 0, "stale": 0, "revalidated": 0, "imported": 0, "stored": 0,
+                      "quarantined": 0, "evicted": 0}
+        self._stats_lock = threading.Lock()
+        self._size_lock = threading.Lock()
+        self._stored_bytes = None  # total object bytes, counted on the first put when max_bytes is set
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def key(self, url, chronicle, variant=""):
+        """Ref key of a page: wiki entities by (type, id, level), so every mirror host and slug shares one entry."""
+        page = entity_key(url) or canonical_url(url)
+        return hashlib.sha1(f"{chronicle}\n{page}\n{variant}".encode("utf-8")).hexdigest()
+
+    def _rekey(self):
+        """Move refs stored under an older key scheme (e.g. per host) to their current key."""
+        moved = 0
+        for old_key, ref in list(self.refs.items()):
+            key = self.key(ref["url"], ref["chronicle"], ref.get("variant", ""))
+            if key == old_key:
+                continue
+            current = self.refs.get(key)
+            if current is None or current["fetched_at"] < ref["fetched_at"]:
+                self._write_ref(ref["chronicle"], key, ref)
+            self.backend.delete_ref(ref["chronicle"], old_key)
+            del self.refs[old_key]
+            moved += 1
+        if moved:
+            print(f"🔑 Re-keyed {moved} cache refs to canonical wiki page keys")
+
+    def meta(self, url, chronicle, variant=""):
+        """Return the ref (url, chronicle, variant, page_type, hash, fetched_at, last_used, status, size, validators), or None."""
+        return self.refs.get(self.key(url, chronicle, variant))
+
+    def _write_ref(self, chronicle, key, ref):
+        self.backend.write_ref(chronicle, key, ref)
+        with self._refs_lock:
+            self.refs[key] = ref
+
+    def _legacy_exists(self, path):
+        """os.path.exists for old cache files, answered from one listing per folder."""
+        folder, name = os.path.split(path)
+        names = self._legacy_dirs.get(folder)
+        if names is None:
+            names = set(os.listdir(folder)) if os.path.isdir(folder) else set()
+            self._legacy_dirs[folder] = names
+        return name in names
+
+    def quarantine(self, url, chronicle, html, reason, variant=""):
+        """Keep a rejected body out of the cache, next to a note of why it was rejected."""
+        path = os.path.join(self.root, QUARANTINE_DIR, str(chronicle), self.key(url, chronicle, variant))
+        _write_atomic(f"{path}.html", html.encode("utf-8"))
+        _write_atomic(f"{path}.json", json.dumps({"url": url, "variant": variant, "reason": reason}).encode("utf-8"))
+        self._count("quarantined")
+        print(f"🚫 Not caching {url}: {reason} (quarantined)")
+
+    def is_fresh(self, ref, now=None):
+        """True while ref is younger than the TTL of its page type."""
+        ttl_days = TTL_DAYS.get(ref.get("page_type"), DEFAULT_TTL_DAYS)
+        if ttl_days is None:
+            return True
+        return (now or time.time()) - ref["fetched_at"] < ttl_days * 86400
+
+    def put(self, url, chronicle, html, status=200, variant="", fetched_at=None, page_type=None, validate=True,
+            validators=None):
+        """Store html for url + chronicle; return its ref, or None if it's not a valid page_type page.
+
+        Bodies without a page_type, or stored with validate=False (e.g.
+        extractor JSON), are not validated. validators (ETag / Last-Modified
+        of the response) let refetch() revalidate the page when it's stale.
+        """
+        checked = bool(page_type and validate)
+        reason = validate_page(html, page_type, status) if checked else None
+        if reason:
+            self.quarantine(url, chronicle, html, reason, variant)
+            return None
+
+        trimmed = False
+        if self.trim and checked:
+            if self.cold is not None:
+                self.cold.put(url, chronicle, html, status, variant, fetched_at, page_type, False, validators)
+            trimmed_html = trim_page(html, page_type)
+            if trimmed_html is not html:
+                trimmed = list(trim_types(page_type))  # the page types this body still has every region of
+            html = trimmed_html
+
+        data = html.encode("utf-8")
+        digest = content_hash(html)
+        if not self.backend.has_object(digest):
+            encoded = self.codec.encode(data)
+            self.backend.write_object(digest, encoded)
+            self._grow(len(encoded))
+
+        now = time.time()
+        ref = {
+            "url": canonical_url(url),
+            "chronicle": chronicle,
+            "variant": variant,
+            "page_type": page_type,
+            "hash": digest,
+            "fetched_at": fetched_at or now,
+            "last_used": now,
+            "status": status,
+            "size": len(data),
+            "validators": validators or {},
+            "trimmed": trimmed,
+        }
+        self._write_ref(chronicle, self.key(url, chronicle, variant), ref)
+        self._count("stored")
+        return ref
+
+    def _grow(self, nbytes):
+        """Account for a new object and evict if the store went over max_bytes."""
+        if not self.max_bytes:
+            return
+        with self._size_lock:
+            if self._stored_bytes is None:
+                self._stored_bytes = sum(size for _, size in self.backend.iter_objects())
+            else:
+                self._stored_bytes += nbytes
+            over = self._stored_bytes > self.max_bytes
+        if over:
+            self.evict()
+
+    def evict(self, max_bytes=None):
+        """Drop least recently used refs (and objects nothing points to) until under EVICT_TO * max_bytes."""
+        max_bytes = max_bytes or self.max_bytes
+        if not max_bytes:
+            return
+        with self._size_lock:
+            sizes = dict(self.backend.iter_objects())
+            with self._refs_lock:
+                refs = sorted(self.refs.items(), key=lambda kv: kv[1].get("last_used", kv[1]["fetched_at"]))
+            users = {}
+            for _, ref in refs:
+                users[ref["hash"]] = users.get(ref["hash"], 0) + 1
+
+            # Objects no ref points to (replaced pages) go first
+            for digest in [d for d in sizes if d not in users]:
+                self.backend.delete_object(digest)
+                del sizes[digest]
+
+            total = sum(sizes.values())
+            target = max_bytes * EVICT_TO
+            evicted = 0
+            for key, ref in refs:
+                if total <= target:
+                    break
+                self.backend.delete_ref(ref["chronicle"], key)
+                with self._refs_lock:
+                    self.refs.pop(key, None)
+                evicted += 1
+                users[ref["hash"]] -= 1
+                if not users[ref["hash"]]:
+                    self.backend.delete_object(ref["hash"])
+                    total -= sizes.pop(ref["hash"], 0)
+            self._stored_bytes = total
+        with self._stats_lock:
+            self.stats["evicted"] += evicted
+        print(f"🧹 Evicted {evicted} least recently used pages — cache now {total / 1e6:.1f} MB")
+
+    def get(self, url, chronicle, variant="", legacy_path=None, page_type=None, validate=True, stale_ok=False):
+        """Return the fresh cached body, importing legacy_path (an old cache file) if valid; None on miss.
+
+        stale_ok=True also returns pages past their TTL (offline reparse never refetches).
+        """
+        ref = self.meta(url, chronicle, variant)
+        if ref is not None and not covers(ref, page_type):
+            ref = None  # trimmed for another page type: refetch the whole page
+        if ref is not None and not stale_ok and not self.is_fresh(ref):
+            self._count("stale")
+            return None
+        if ref is not None:
+            html = self.read(ref)
+            if html is not None:
+                self._count("hits")
+                now = time.time()
+                if now - ref.get("last_used", 0) > TOUCH_INTERVAL:
+                    ref["last_used"] = now
+                    self._write_ref(chronicle, self.key(url, chronicle, variant), ref)
+                return html
+
+        if legacy_path and self._legacy_exists(legacy_path):
+            with open(legacy_path, "r", encoding="utf-8") as f:
+                html = f.read()
+            ref = self.put(url, chronicle, html, variant=variant, fetched_at=os.path.getmtime(legacy_path),
+                           page_type=page_type, validate=validate)
+            if ref is not None:
+                self._count("imported")
+                if stale_ok or self.is_fresh(ref):
+                    return html
+                self._count("stale")
+                return None
+
+        self._count("misses")
+        return None
+
+    def locate(self, url, chronicle, variant="", legacy_path=None, page_type=None, validate=True, stale_ok=False):
+        """Where get() would read the body from, without reading it; None on a miss.
+
+        ("ref", ref) for a stored page, ("file", legacy_path, page_type) for
+        an old cache file (page_type None when it needs no validation):
+        anything a CacheReader on the same store can read with read_source.
+        Old cache files are not imported.
+        """
+        ref = self.meta(url, chronicle, variant)
+        if ref is not None and not covers(ref, page_type):
+            ref = None
+        if ref is not None and not stale_ok and not self.is_fresh(ref):
+            self._count("stale")
+            return None
+        if ref is not None and self.backend.has_object(ref["hash"]):
+            self._count("hits")
+            return "ref", ref
+
+        if legacy_path and self._legacy_exists(legacy_path):
+            if stale_ok or self.is_fresh({"page_type": page_type, "fetched_at": os.path.getmtime(legacy_path)}):
+                self._count("hits")
+                return "file", legacy_path, page_type if validate else None
+            self._count("stale")
+            return None
+
+        self._count("misses")
+        return None
+
+    def has(self, url, chronicle, variant="", legacy_path=None, page_type=None):
+        """True when get() would return a body (without reading it)."""
+        ref = self.meta(url, chronicle, variant)
+        if ref is not None and covers(ref, page_type):
+            return self.is_fresh(ref)
+        if not (legacy_path and self._legacy_exists(legacy_path)):
+            return False
+        return self.is_fresh({"page_type": page_type, "fetched_at": os.path.getmtime(legacy_path)})
+
+    def plan(self, pages, page_type=None, variant=""):
+        """Print "N cached / M to fetch" for (url, chronicle[, legacy_path]) pages; return the ones to fetch."""
+        to_fetch = [p for p in pages if not self.has(p[0], p[1], variant, p[2] if len(p) > 2 else None, page_type)]
+        print(f"📋 {len(pages) - len(to_fetch)} cached / {len(to_fetch)} to fetch ({page_type or 'pages'})")
+        return to_fetch
+
+    def fetch(self, fetcher, url, chronicle, required_ids=(), variant="", legacy_path=None, page_type=None):
+        """Cached body of url, or fetch it with fetcher.get and store it (if valid)."""
+        html = self.get(url, chronicle, variant, legacy_path, page_type)
+        if html is not None:
+            return html
+        return self.refetch(fetcher, url, chronicle, required_ids, variant, page_type)
+
+    def refetch(self, fetcher, url, chronicle, required_ids=(), variant="", page_type=None):
+        """Download url and store it; a stale cached copy is revalidated with a conditional GET.
+
+        A 304 only renews the ref's fetched_at and returns the cached body.
+        Whatever else the fetcher returns (None, an extractor dict) is
+        passed through; bodies are stored if valid.
+        """
+        ref = self.meta(url, chronicle, variant)
+        if ref is not None and not covers(ref, page_type):
+            ref = None  # a 304 would hand back a body trimmed for another page type
+        validators = ref.get("validators") if ref else None
+        status, html, validators = fetcher.conditional_get(url, required_ids, validators)
+        if status == 304:
+            cached = self.read(ref)
+            if cached is not None:
+                ref["fetched_at"] = ref["last_used"] = time.time()
+                self._write_ref(chronicle, self.key(url, chronicle, variant), ref)
+                self._count("revalidated")
+                return cached
+            status, html, validators = fetcher.conditional_get(url, required_ids)  # object lost: full GET
+        if isinstance(html, str):
+            self.put(url, chronicle, html, variant=variant, page_type=page_type, validators=validators)
+        return html
+
+    def export_bundle(self, path, chronicles=None, page_types=None, since=None, until=None):
+        """Pack the matching refs and their objects (as stored) into one tar bundle; return the ref count.
+
+        chronicles / page_types are collections to keep (None = all); since / until bound fetched_at (epoch seconds).
+        """
+        refs = {
+            key: ref for key, ref in self.refs.items()
+            if (chronicles is None or ref["chronicle"] in chronicles)
+            and (page_types is None or ref.get("page_type") in page_types)
+            and (since is None or ref["fetched_at"] >= since)
+            and (until is None or ref["fetched_at"] < until)
+        }
+        index = {"version": 1, "refs": refs, "dicts": sorted(self.codec.dicts)}
+
+        def add(tar, name, data):
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = time.time()
+            tar.addfile(info, io.BytesIO(data))
+
+        written = set()
+        with tarfile.open(path, "w") as tar:
+            add(tar, "index.json", json.dumps(index).encode("utf-8"))
+            for dict_id, d in self.codec.dicts.items():
+                add(tar, f"dicts/{dict_id}.zdict", d.as_bytes())
+            for ref in refs.values():
+                digest = ref["hash"]
+                if digest in written:
+                    continue
+                data = self.backend.read_object(digest)
+                if data is None:
+                    print(f"⚠️ Object of {ref['url']} is missing — not exported.")
+                    continue
+                add(tar, f"objects/{digest}", data)
+                written.add(digest)
+        print(f"📦 Exported {len(refs)} pages ({len(written)} unique bodies) → {path}")
+        return len(refs)
+
+    def import_bundle(self, path):
+        """Merge a bundle into this cache: objects deduped by hash, newer local refs win; return refs merged.
+
+        Bundles come from other machines, so nothing in them is trusted:
+        dictionaries must carry the id they are filed under, every body
+        must hash to its ref's hash, and refs are stored under the key this
+        cache computes for them. Entries that fail a check are skipped.
+        """
+        merged = new_objects = rejected = 0
+        with tarfile.open(path, "r") as tar:
+            index = json.load(tar.extractfile("index.json"))
+            for dict_id in index.get("dicts", []):
+                if zstd is None or dict_id in self.codec.dicts:
+                    continue
+                if type(dict_id) is not int:
+                    print(f"⚠️ Bundle dictionary id {dict_id!r} is not a number — skipped.")
+                    continue
+                try:
+                    data = tar.extractfile(f"dicts/{dict_id}.zdict").read()
+                except KeyError:
+                    print(f"⚠️ Bundle dictionary {dict_id} is missing — skipped.")
+                    continue
+                if zstd.ZstdCompressionDict(data).dict_id() != dict_id:
+                    print(f"⚠️ Bundle dictionary {dict_id} has another id — skipped.")
+                    continue
+                dict_path = os.path.join(self.codec.dict_dir, f"{dict_id}.zdict")
+                _write_atomic(dict_path, data)
+                os.utime(dict_path, (0, 0))  # older than ours: our newest dictionary stays current
+            if zstd is not None:
+                self.codec._load_dicts()
+
+            for ref in index["refs"].values():
+                if not _valid_ref(ref):
+                    rejected += 1
+                    continue
+                key = self.key(ref["url"], ref["chronicle"], ref.get("variant", ""))
+                local = self.refs.get(key)
+                if local is not None and local["fetched_at"] >= ref["fetched_at"]:
+                    continue
+                if not self.backend.has_object(ref["hash"]):
+                    try:
+                        data = tar.extractfile(f"objects/{ref['hash']}").read()
+                    except KeyError:
+                        continue  # was missing on the exporting node
+                    body = self.codec.decode(data)
+                    if body is None or hashlib.sha256(body).hexdigest() != ref["hash"]:
+                        print(f"⚠️ Bundle body of {ref['url']} does not match its hash — skipped.")
+                        rejected += 1
+                        continue
+                    self.backend.write_object(ref["hash"], data)
+                    self._grow(len(data))
+                    new_objects += 1
+                self._write_ref(ref["chronicle"], key, ref)
+                merged += 1
+        print(f"📥 Imported {merged} pages ({new_objects} new bodies, {rejected} rejected) from {path}")
+        return merged
+
+    def iter_refs(self, chronicle=None):
+        """Yield every ref (optionally of one chronicle) without reading bodies."""
+        with self._refs_lock:
+            refs = list(self.refs.values())
+        for ref in refs:
+            if chronicle is None or ref["chronicle"] == chronicle:
+                yield ref
+
+    def iter_pages(self, chronicle=None):
+        """Yield (ref, html) for every cached page — the input of offline reparse jobs."""
+        for ref in self.iter_refs(chronicle):
+            html = self.read(ref)
+            if html is not None:
+                yield ref, html
+
+    def train_dictionary(self, samples=DICT_SAMPLES, size=DICT_SIZE):
+        """Train a zstd dictionary on up to `samples` cached pages; new objects use it."""
+        bodies = []
+        for _, html in self.iter_pages():
+            bodies.append(html.encode("utf-8"))
+            if len(bodies) >= samples:
+                break
+        dict_id = self.codec.train(bodies, size)
+        print(f"📚 Trained zstd dictionary {dict_id} on {len(bodies)} pages")
+        return dict_id
+
+    def recompress(self):
+        """Re-encode every stored object with the current compression (and dictionary)."""
+        seen = set()
+        before = after = 0
+        for ref in self.iter_refs():
+            digest = ref["hash"]
+            if digest in seen:
+                continue
+            seen.add(digest)
+            stored = self.backend.read_object(digest)
+            data = self.codec.decode(stored) if stored is not None else None
+            if data is None:
+                continue
+            encoded = self.codec.encode(data)
+            self.backend.write_object(digest, encoded)
+            before += len(stored)
+            after += len(encoded)
+        print(f"🗜️ Recompressed {len(seen)} objects: {before / 1e6:.1f} MB → {after / 1e6:.1f} MB")
+
+    def print_stats(self):
+        print(
+            f"🗄️ HTML cache: {self.stats['hits']} hits, {self.stats['imported']} imported from old cache files, "
+            f"{self.stats['misses']} misses, {self.stats['stale']} stale ({self.stats['revalidated']} unchanged), "
+            f"{self.stats['stored']} stored, "
+            f"{self.stats['quarantined']} quarantined, {self.stats['evicted']} evicted"
+        )
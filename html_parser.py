@@ -0,0 +1,129 @@
+# HTML → BeautifulSoup tree for the extractors, with a pluggable parser backend
+import re
+from bs4 import BeautifulSoup, SoupStrainer
+from page_types import REGIONS, WHOLE_PAGE_TYPES
+
+try:
+    import lxml  # optional: C parser, several times faster than html.parser
+except ImportError:
+    lxml = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser  # optional: lexbor, the HTML5 engine behind selectolax
+except ImportError:
+    LexborHTMLParser = None
+
+# --- Config ---
+PARSER = "html.parser"  # "html.parser" (stdlib), "lxml" or "lexbor"; check a switch with parser_parity.py
+PARSERS = ("html.parser", "lxml", "lexbor")
+LEXBOR_DROP = "script, style, noscript"  # subtrees no extractor reads (class stats are read from the raw HTML)
+REGION_PARSE = True     # build only the page type's page_types.REGIONS subtrees, not navigation/footer/scripts
+
+# tag#id.class selectors (what REGIONS uses); a page type with anything fancier is parsed whole
+SIMPLE_SELECTOR = re.compile(r"^(?P<tag>[a-z][a-z0-9]*)?(?P<rest>(?:[#.][\w-]+)*)$", re.I)
+
+_strainers = {}
+
+
+class RegionStrainer(SoupStrainer):
+    """parse_only filter that builds only the elements matching simple tag#id.class selectors (and their subtrees)."""
+
+    def __init__(self, rules):
+        super().__init__()
+        self.rules = rules
+
+    def wanted(self, name, attrs):
+        attrs = attrs or {}
+        classes = attrs.get("class") or ()
+        if isinstance(classes, str):
+            classes = classes.split()
+        for tag, tag_id, tag_classes in self.rules:
+            if tag and tag != name:
+                continue
+            if tag_id and attrs.get("id") != tag_id:
+                continue
+            if tag_classes and not tag_classes.issubset(classes):
+                continue
+            return True
+        return False
+
+    def allow_tag_creation(self, nsprefix, name, attrs):  # bs4 >= 4.13
+        return self.wanted(name, attrs)
+
+    def allow_string_creation(self, string):
+        return False
+
+    def search_tag(self, name=None, attrs={}):  # bs4 4.12
+        return self.wanted(name, attrs)
+
+    @property
+    def excludes_everything(self):
+        return False
+
+
+def region_strainer(page_type):
+    """RegionStrainer for page_type's REGIONS, or None when the page must be parsed whole."""
+    if page_type not in _strainers:
+        rules = []
+        for selector in () if page_type in WHOLE_PAGE_TYPES else REGIONS.get(page_type) or ():
+            m = SIMPLE_SELECTOR.match(selector)
+            if not m or not selector:
+                rules = []
+                break
+            parts = re.findall(r"([#.])([\w-]+)", m.group("rest"))
+            tag_id = next((value for kind, value in parts if kind == "#"), None)
+            tag_classes = frozenset(value for kind, value in parts if kind == ".")
+            rules.append(((m.group("tag") or "").lower() or None, tag_id, tag_classes))
+        _strainers[page_type] = RegionStrainer(rules) if rules else None
+    return _strainers[page_type]
+
+
+def available_parsers():
+    """Backends whose libraries are installed ("lexbor" builds its tree with lxml, so it needs both)."""
+    installed = {"html.parser": True, "lxml": lxml is not None, "lexbor": lxml is not None and LexborHTMLParser is not None}
+    return [name for name in PARSERS if installed[name]]
+
+
+def set_parser(name, region_parse=None):
+    """Switch the backend (and optionally REGION_PARSE) of this process (reparse.py also runs it in every worker)."""
+    global PARSER, REGION_PARSE
+    if name not in available_parsers():
+        raise ValueError(f"Parser {name!r} is not available (installed: {', '.join(available_parsers())})")
+    PARSER = name
+    if region_parse is not None:
+        REGION_PARSE = region_parse
+
+
+def lexbor_regions(tree, selectors):
+    """HTML of the outermost nodes matching selectors, in document order."""
+    kept = set()
+    parts = []
+    for node in tree.css(", ".join(selectors)):
+        parent = node.parent
+        while parent is not None and parent.mem_id not in kept:
+            parent = parent.parent
+        if parent is None:
+            kept.add(node.mem_id)
+            parts.append(node.html)
+    return "<html><body>" + "".join(parts) + "</body></html>"
+
+
+def make_soup(html, page_type=None, parser=None):
+    """BeautifulSoup tree of html, built by parser (default PARSER).
+
+    With a page_type (and REGION_PARSE on), only the elements of its
+    page_types.REGIONS are built, so the extractor's selectors see the same
+    first match without a DOM for the rest of the page. "lexbor" parses the
+    page with lexbor (HTML5 tree construction, as in Chrome), drops
+    LEXBOR_DROP or slices out the regions, and lets lxml build the tree.
+    """
+    parser = parser or PARSER
+    strainer = region_strainer(page_type) if page_type and REGION_PARSE else None
+    if parser == "lexbor":
+        tree = LexborHTMLParser(html)
+        if strainer:
+            return BeautifulSoup(lexbor_regions(tree, REGIONS[page_type]), "lxml")
+        for node in tree.css(LEXBOR_DROP):
+            node.decompose()
+        return BeautifulSoup(tree.html, "lxml")
+    return BeautifulSoup(html, parser, parse_only=strainer)
@@ -0,0 +1,562 @@
+# item page → details row: extraction shared by get_items_details.py and the offline reparse
+import csv
+import hashlib
+import json
+import os
+import re
+from functools import lru_cache
+import pandas as pd
+from extract_spec import ITEM_ID, LEVEL, NPC_ID, QUEST_ID, SET_ID, SKILL_ID, Field, Record, Rows, Spec, icon_name, label_cell
+from html_parser import make_soup
+
+EXTRACT_VARIANT = "extract"  # cache variant holding the in-page extractor's JSON
+
+# --- Stats table labels → columns (also passed to the in-page extractor) ---
+STAT_NAME_MAP = {
+    "Шанс Физ. Крит. Атк.": "chance_of_phys_crit_atk",
+    "Chance of Phys. Crit. Atk.": "chance_of_phys_crit_atk",
+    "P. Atk.": "p_atk",
+    "M. Atk.": "m_atk",
+    "P.Def.": "p_def",
+    "M.Def.": "m_def",
+    "Crit. Rate": "crit_rate",
+    "Accuracy": "accuracy",
+    "Evasion": "evasion",
+    "Shield Def.": "shield_defence",   # ✅ match actual key below
+    "Shield Rate": "shield_rate",
+    "MP Consumption": "mp_consume",
+    "Soul/Spiritshot Consumption": "soul_spirit_shots_consumption",
+    "Selling price NPC": "selling_price_npc",
+    "Weight": "weight",
+    # ✅ Add more if you encounter new labels
+}
+
+
+def clean_number(text):
+    if text is None:
+        return None
+    text = str(text).strip()
+
+    # ✅ Remove spaces and non-breaking spaces
+    text = text.replace("\u00A0", "").replace(" ", "")
+
+    # ✅ Replace commas with dots if they're decimal separators (rare)
+    text = text.replace(",", ".")
+
+    # ✅ Remove thousands separators like 1.104.850 → 1104850
+    text = re.sub(r"(?<=\d)\.(?=\d{3}(\D|$))", "", text)
+
+    # ✅ Remove non-digit except dot (for decimals)
+    text = re.sub(r"[^\d.]", "", text)
+
+    if text == "":
+        return None
+
+    # ✅ Convert to int if possible
+    try:
+        num = float(text)
+        return int(num) if num.is_integer() else num
+    except ValueError:
+        return None
+
+def slugify_link(url: str) -> str:
+    # Works for full URLs or relative paths
+    match = re.search(r"/item/([^/]+)/", url)
+    if match:
+        return match.group(1)  # e.g., "1234-zubeis-breastplate"
+    # Fallback: hash the URL if pattern not found
+    return hashlib.md5(url.encode()).hexdigest()
+
+def snake_case(text: str) -> str:
+    text = text.lower()
+    text = re.sub(r"[^a-z0-9]+", "_", text)
+    return text.strip("_")
+
+def item_cache_file(url: str, chronicle: str) -> str:
+    """Old per-script cache location, imported into the shared cache on first read."""
+    return os.path.join("cache/item_details_data", chronicle, f"{slugify_link(url)}.html")
+
+def item_extract_file(url: str, chronicle: str) -> str:
+    """Old location of the in-page extractor's JSON (next to the HTML file)."""
+    return os.path.splitext(item_cache_file(url, chronicle))[0] + ".json"
+
+
+@lru_cache(maxsize=None)
+def stat_key(label):
+    """Column of a stats-table label (STAT_NAME_MAP, else snake_case), memoized across items."""
+    return STAT_NAME_MAP.get(label, snake_case(label))
+
+def level_bounds(text):
+    """(min, max) of a "20 ~ 30" level cell; a single number is the minimum."""
+    if "~" not in text:
+        return clean_number(text), None
+    parts = [p.strip() for p in text.split("~")]
+    if len(parts) != 2:
+        return None, None
+    return clean_number(parts[0]), clean_number(parts[1])
+
+def recipe_name(raw_name):
+    raw_name = re.sub(r"^Recipe:\s*", "", raw_name, flags=re.IGNORECASE)    # Remove prefix
+    raw_name = re.sub(r"\(\d+%?\)", "", raw_name).strip()                   # Remove (60%) / (100%)
+    return re.sub(r"\b(NG|D|C|B|A|S)\b$", "", raw_name).strip()            # Remove trailing grade
+
+def skill_name(full_text):
+    full_text = re.sub(r"Lv\.\s*\d+", "", full_text).strip()
+    # Remove the “(Grade X)” part
+    return re.sub(r"\(Grade\s+[A-D|S\d+]*\)", "", full_text, flags=re.IGNORECASE).strip()
+
+def set_name(name):
+    name = name.replace("{PvP}", "")
+    name = re.sub(r"[\-–]\s*Set", "", name, flags=re.IGNORECASE)                  # “– Set” / "- Set" / "–Set"
+    name = re.sub(r"\s*\b(NG|D|C|B|A|S)\b$", "", name, flags=re.IGNORECASE)       # trailing grade letters
+    return re.sub(r"\s+", " ", name).strip()
+
+def without_grade(row):
+    """Contained item name without its grade suffix."""
+    if row["grade"] is not None and row["name"].endswith(row["grade"]):
+        row["name"] = row["name"][: -len(row["grade"])].strip()
+    return row
+
+
+# --- Item page spec: nested tables and link lists (compiled once) ---
+ITEM_SPEC = Spec({
+    "recipes": Rows("a.item-name", scope=label_cell(r"Recipes"), fields={
+        "recipe_id": Field(attr="href", regex=ITEM_ID, convert=int),
+        "recipe_name": Field(".item-name__content", sep=" ", convert=lambda name: recipe_name(name) if name else name),
+        "recipe_icon": Field("img", attr="src", convert=icon_name),
+        "recipe_grade": Field(".item-grade"),
+        "recipe_chance": Field(strip=False, regex=r"\((\d+)%\)", convert=int),  # 60%, 100%, ...
+        "recipe_link": Field(attr="href", default=""),
+    }),
+    "item_skills": Rows("a.item-name", scope=label_cell(r"Item skills"), fields={
+        "id": Field(attr="href", regex=SKILL_ID, convert=int),
+        "name": Field(".item-name__content", sep=" ", convert=skill_name),
+        "icon": Field("img", attr="src", convert=icon_name),
+        "level": Field(".item-name__content", sep=" ", regex=LEVEL, convert=int),
+        "link": Field(attr="href", default=""),
+    }),
+    "drops": Rows("#drop table tbody tr", cells=3, fields={
+        "npc_id": Field("a.item-name", cell=0, attr="href", regex=NPC_ID, convert=int),
+        "npc_name": Field(".item-name__content", cell=0, sep=" ", convert=lambda name: re.sub(r"Lv\.\s*\d+", "", name).strip()),
+        "npc_level": Field(".item-name__additional", cell=0, regex=LEVEL, convert=int),
+        "npc_link": Field("a.item-name", cell=0, attr="href"),
+        "amount": Field(cell=1, convert=lambda text: re.sub(r"[^\d\- ]", "", text).strip() or None),
+        "chance": Field(cell=2, convert=lambda text: clean_number(text.replace("%", "").strip())),
+    }),
+    "crystals": Rows("#crystals table tbody tr", cells=3, fields={
+        "modification": Field(cell=0, convert=clean_number),
+        "crystallization": Field(cell=1, convert=clean_number),
+        "fail": Field(cell=2, convert=clean_number),
+    }),
+    "quest_rewards": Rows("#questreward table tbody tr", cells=2, fields={
+        "quest_id": Field("a.item-name", cell=0, attr="href", regex=QUEST_ID, convert=int),
+        "quest_name": Field(cell=0, sep=" "),
+        "quest_link": Field("a.item-name", cell=0, attr="href"),
+        "level_min": Field(cell=1, convert=lambda text: level_bounds(text)[0]),
+        "level_max": Field(cell=1, convert=lambda text: level_bounds(text)[1]),
+    }),
+    "quest_goal": Rows("#questGoal table tbody tr", cells=2, fields={
+        "quest_name": Field(cell=0, sep=" "),
+        "quest_link": Field("a.item-name", cell=0, attr="href"),
+        "level_min": Field(cell=1, convert=lambda text: level_bounds(text)[0]),
+        "level_max": Field(cell=1, convert=lambda text: level_bounds(text)[1]),
+    }),
+    "contained": Rows("#contained table tbody tr", keep=lambda tr: tr.find("td") is not None, finish=without_grade, fields={
+        "id": Field("a.item-name", cell=0, attr="href", regex=ITEM_ID, convert=int),
+        "name": Field("a.item-name .item-name__content", cell=0, sep=" "),
+        "grade": Field("a.item-name .item-grade", cell=0),
+        "icon": Field("img", cell=0, attr="src", convert=icon_name),
+        "chance": Field(cell=0, strip=False, regex=r"\(([\d.,]+)\)", convert=clean_number),  # value inside (xxxxxx)
+        "link": Field("a.item-name", cell=0, attr="href"),
+    }),
+    "soul_crystals": Rows("div.collapser > div", scope=label_cell(r"Soul Crystals"),
+                          keep=lambda block: block.select_one("a.item-name") is not None, fields={
+        "augmentation_item": Record("a.item-name", {
+            "id": Field(attr="href", regex=ITEM_ID, convert=int),
+            "name": Field(".item-name__content", sep=" "),
+            "icon": Field("img", attr="src", convert=icon_name),
+            "link": Field(attr="href", default=""),
+            "effect": Field(".item-name__additional"),
+            "grade": Field(".item-grade"),
+        }),
+        # Materials are in the next sibling <div style="margin...">
+        "materials": Rows("a.item-name", scope=lambda block: block.find_next_sibling("div"), fields={
+            "id": Field(attr="href", regex=ITEM_ID, convert=int),
+            "name": Field(".item-name__content", sep=" "),
+            "icon": Field("img", attr="src", convert=icon_name),
+            "link": Field(attr="href", default=""),
+            "grade": Field(".item-grade"),
+            "amount": Field(".item-name__content", sep=" ", regex=r"\(([\d,\.]+)\s*pcs\)", convert=int),  # (555 pcs)
+        }),
+    }),
+    "item_set": Rows("a.item-name", scope=label_cell(r"Set part"), fields={
+        "set_id": Field(attr="href", regex=SET_ID, convert=int),
+        "set_name": Field(".item-name__content", sep=" ", convert=lambda name: set_name(name) if name else name),
+        "set_icon": Field("img", attr="src", convert=icon_name),
+        "set_grade": Field(".item-grade"),
+        "set_class": Field(".item-class"),  # Foundation, etc.
+        "set_full_link": Field(attr="href", default=""),
+        "pvp": Field(".item-name__content", sep=" ", convert=lambda name: "{PvP}" in name, default=False),
+    }),
+})
+
+
+def item_row_from_js(row, url, data):
+    """Build the same details row as the BeautifulSoup path from ITEM_DETAILS_JS output."""
+    def as_json(value):
+        return json.dumps(value, ensure_ascii=False) if value else None
+
+    return {
+        "item_id": row["id"],
+        "item_name": data["item_name"],
+        "item_grade": data["item_grade"],
+        "item_icon": data["item_icon"],
+        "item_description": data["item_description"],
+        "item_description_json": as_json(data["item_description_json"]),
+        "item_skills": as_json(data["item_skills"]),
+        "item_set": as_json(data["item_set"]),
+        "chronicle": data["chronicle"],
+        **data["stats"],
+        "recipes": as_json(data["recipes"]),
+        "link": url,
+        "restrictions": as_json(data["restrictions"]),
+        "drops": as_json(data["drops"]),
+        "quest_rewards": as_json(data["quest_rewards"]),
+        "quest_goal": as_json(data["quest_goal"]),
+        "contained": as_json(data["contained"]),
+        "crystals": as_json(data["crystals"]),
+        "soul_crystals": as_json(data["soul_crystals"]),
+    }
+
+def parse_item_page(html_source, item_id, url):
+    """Details row of one item page (the chronicle comes from the page's active server tab)."""
+    # ✅ Parse HTML (from cache or fresh download)
+    soup = make_soup(html_source, "item")
+
+
+
+
+
+
+    # --- Basic info ---
+    name_tag = soup.select_one("#result-title .item-name__content")
+    item_name = name_tag.get_text(strip=True) if name_tag else None
+
+    grade_tag = soup.select_one("#result-title .item-grade")
+    grade = grade_tag.get_text(strip=True) if grade_tag else None
+
+    # --- Clean main name (remove grade suffix) ---
+    if grade and item_name.endswith(grade):
+        item_name = item_name[: -len(grade)].strip()
+
+    # --- Recipes, skills, drops, quests, contained, soul crystals, set (ITEM_SPEC) ---
+    nested = ITEM_SPEC(soup)
+
+    icon_tag = soup.select_one("#result-title .item-icon img")
+    icon_url = icon_tag["src"] if icon_tag else ""
+    icon_basename = os.path.splitext(os.path.basename(icon_url))[0] if icon_url else None
+
+    # --- Chronicle ---
+    chronicle_tag = soup.select_one("#server-tabs .nav-link.active")
+    chronicle = chronicle_tag.get_text(strip=True) if chronicle_tag else None
+
+
+    # --- Stats table ---
+    stats = {}
+    for tr in soup.select("#result-stats table tr"):
+        tds = tr.find_all("td")
+        if len(tds) != 2:
+            continue
+
+        key_raw = tds[0].get_text(strip=True)
+        key = stat_key(key_raw)
+        val_raw = tds[1].get_text(" ", strip=True)
+
+        if key == "item_skills":
+            continue
+
+        # ✅ Special handling: Soul/Spiritshot consumption
+        if key == "soul_spirit_shots_consumption":
+            if "/" in val_raw:
+                parts = [p.strip() for p in val_raw.split("/")]
+                try:
+                    soulshot = int(parts[0]) if int(parts[0]) > 0 else None
+                    spiritshot = int(parts[1]) if int(parts[1]) > 0 else None
+                except ValueError:
+                    soulshot, spiritshot = None, None
+            else:
+                soulshot, spiritshot = None, None
+
+            stats["soulshot_consumption"] = soulshot
+            stats["spiritshot_consumption"] = spiritshot
+            continue  # 🚨 Important: skip default handling
+
+        # ✅ Special handling: Shield Defence with percent
+        if key == "shield_defence":
+            td_html = str(tds[1])  # 🔥 you were missing this variable before
+            main_val_match = re.search(r"(\d+)", val_raw)
+            if main_val_match:
+                stats["shield_defence_value"] = int(main_val_match.group(1))
+
+            percent_match = re.search(r"\(([\d.,]+)%\)", td_html)
+            if percent_match:
+                stats["shield_defence_percent"] = int(float(percent_match.group(1).replace(",", ".")))
+            else:
+                stats["shield_defence_percent"] = None
+
+            continue  # ✅ do not add original key
+
+        # ✅ Default handling for all other stats
+        val_clean = clean_number(val_raw)
+        stats[key] = val_clean if val_clean is not None else val_raw
+
+    # ✅ Drop 'recipes' from stats (already parsed separately)
+    if "recipes" in stats:
+        del stats["recipes"]
+
+    # Example: type_text might be "Weapon / Sword" or "Armor / Heavy"
+    type_text = stats.get("type", None)
+
+    main_type, sub_type = None, None
+    if type_text and type_text != None:
+        parts = [p.strip() for p in type_text.split("/")]
+        if len(parts) > 0:
+            main_type = parts[0]
+        if len(parts) > 1:
+            sub_type = parts[1]
+
+    stats["type"] = main_type
+    stats["subtype"] = sub_type.strip("{}").lower() if sub_type else None
+
+    # --- Item Description ---
+    description_tag = soup.select_one("#result-title div[style*='margin-left'] p")
+    item_description = None
+    item_description_json = None
+
+    if description_tag:
+        # ✅ Replace <br> with newlines
+        for br in description_tag.find_all("br"):
+            br.replace_with("\n")
+
+        raw_text = description_tag.get_text("\n", strip=True)
+        item_description = raw_text if raw_text else None
+
+        effects = []
+        stat_type = None
+        has_header = False
+
+        for line in [l.strip() for l in raw_text.split("\n") if l.strip()]:
+            # ✅ Detect header (<Effects>, <Available Soul Crystals>, etc.)
+            if line.startswith("<") and line.endswith(">"):
+                stat_type = line.strip("<>").strip()
+                has_header = True
+                continue
+
+            # ✅ If no header was seen yet — ignore lines
+            if not has_header:
+                continue
+
+            # ✅ Try "Stat: Value" format
+            match = re.match(r"^(.*?):\s*(.*)$", line)
+            if match:
+                stat_name = match.group(1).strip()
+                stat_desc = match.group(2).strip()
+            else:
+                # ✅ If no colon, just store the full line as description
+                stat_name = None
+                stat_desc = line
+
+            # ✅ Clean garbage lines (like <font color=...>)
+            if stat_desc.lower().startswith("<font"):
+                continue
+
+            if stat_desc:
+                effects.append({
+                    "type": stat_name,
+                    "description": stat_desc
+                })
+
+        # ✅ Only if a <Header> exists and we collected effects
+        if has_header and effects:
+            # Filter: remove empty description
+            effects = [e for e in effects if e["description"].strip() != ""]
+            if effects:
+                item_description_json = [{
+                    "stat_type": stat_type,
+                    "list": effects
+                }]
+        else:
+            item_description_json = None
+
+    # --- Restrictions ---
+    restrictions_json = {}
+
+    # Find the specific Restrictions row
+    restrictions_row = None
+    for tr in soup.select("#result-stats table tr"):
+        first_td = tr.find("td")
+        if first_td and "Restrictions" in first_td.get_text():
+            restrictions_row = tr
+            break
+
+    if restrictions_row:
+        for span in restrictions_row.select("td span"):
+            text = span.get_text(strip=True)
+            if not text:
+                continue
+            key = snake_case(text)
+            has_check = bool(span.select_one(".fa-check"))
+            restrictions_json[key] = has_check
+
+    # ✅ Clean up: remove invalid/empty sets
+    set_json = [
+        s for s in nested["item_set"] 
+        if not (
+            s["set_id"] is None and 
+            (not s["set_name"] or s["set_name"].strip() == "") and 
+            s["set_icon"] is None and 
+            s["set_grade"] is None
+        )
+    ]
+
+
+
+    # --- Append result ---
+    return {
+        "item_id": item_id,
+        "item_name": item_name,
+        "item_grade": grade,
+        "item_icon": icon_basename,
+
+        "item_description": item_description,
+        "item_description_json": json.dumps(item_description_json, ensure_ascii=False) if item_description_json else None,
+
+        "item_skills": json.dumps(nested["item_skills"], ensure_ascii=False) if nested["item_skills"] else None,
+        "item_set": json.dumps(set_json, ensure_ascii=False) if set_json else None,
+
+        "chronicle": chronicle,
+
+        **stats,
+
+        #"recipe_id": recipe_id,
+        #"recipe_name": recipe_name,
+        #"recipe_icon": recipe_icon,
+        #"recipe_grade": recipe_grade,
+
+        "recipes": json.dumps(nested["recipes"], ensure_ascii=False) if nested["recipes"] else None,
+
+        "link": url,
+
+        "restrictions": json.dumps(restrictions_json, ensure_ascii=False) if restrictions_json else None,
+        "drops": json.dumps(nested["drops"], ensure_ascii=False) if nested["drops"] else None,
+        "quest_rewards": json.dumps(nested["quest_rewards"], ensure_ascii=False) if nested["quest_rewards"] else None,
+        "quest_goal": json.dumps(nested["quest_goal"], ensure_ascii=False) if nested["quest_goal"] else None,
+        "contained": json.dumps(nested["contained"], ensure_ascii=False) if nested["contained"] else None,
+        "crystals": json.dumps(nested["crystals"], ensure_ascii=False) if nested["crystals"] else None,
+        "soul_crystals": json.dumps(nested["soul_crystals"], ensure_ascii=False) if nested["soul_crystals"] else None,
+    }
+
+
+def write_items_tsv(details, output_file):
+    """Normalize the details rows (numeric columns, column order) and save them as TSV; return the DataFrame."""
+    df_out = pd.DataFrame(details)
+
+    # ✅ Convert all null-like values to "Null" only for export
+    df_out = df_out.fillna("Null")
+    df_out = df_out.replace(["", "nan", "NaN", None], "Null")
+
+    # --- Convert numeric columns to int or Null ---
+    numeric_cols = [
+        "item_id",
+        "p_atk",
+        "m_atk",
+        "selling_price_npc",
+        "weight",
+        "mp_consume",
+        "p_def",
+        "m_def",
+        "crit_rate",
+        "accuracy",
+        "evasion",
+        "shield_defence_value",
+        "shield_defence_percent",
+        "shield_rate",
+        "chance_of_phys_crit_atk",
+        "soulshot_consumption",
+        "spiritshot_consumption"
+    ]
+
+    for col in numeric_cols:
+        if col in df_out.columns:
+            df_out[col] = (
+                df_out[col]
+                .replace(["Null", "", None], 0)       # unify nulls as 0 first
+                .fillna(0)
+                .astype(str)
+                .str.replace(r"[^\d\.-]", "", regex=True)  # strip non-numeric
+                .replace("", 0)
+                .astype(float)
+                .round(0)
+                .astype("Int64")                      # ✅ keep nullable integer type
+            )
+
+            # 🔥 Replace 0 with Null (pd.NA)
+            df_out[col] = df_out[col].replace(0, pd.NA)
+
+    columns_json = json.dumps(df_out.columns.tolist(), indent=4)
+    print(columns_json)
+
+    ordered_columns = [
+        "item_id",
+        "item_name",
+        "item_grade",
+        "item_icon",
+        "item_skills",
+        "item_description",
+        "item_description_json",
+        "item_set",
+
+        "chronicle",
+        "type",
+        "subtype",
+        "link",
+        "p_atk",
+        "m_atk",
+        "accuracy",
+        "crit_rate",
+        "evasion",
+        "p_def",
+        "m_def",
+        "shield_defence_value",
+        "shield_defence_percent",
+        "shield_rate",
+        "chance_of_phys_crit_atk",
+        "soulshot_consumption",
+        "spiritshot_consumption",
+        "mp_consume",
+        "selling_price_npc",
+        "weight",    
+
+        "can_it_be_used_at_the_olympiad",
+        "restrictions",
+
+        #"recipe_id",
+        #"recipe_name",
+        #"recipe_icon",
+        #"recipe_grade",
+
+        "recipes",
+
+        "drops",
+        "quest_rewards",
+        "quest_goal",
+        "contained",
+        "crystals"
+    ]
+
+    # ✅ Reorder columns safely
+    df_out = df_out[[c for c in ordered_columns if c in df_out.columns]]
+
+    df_out.to_csv(output_file, sep="\t", index=False, quoting=csv.QUOTE_MINIMAL)
+    print(f"\n💾 Saved {len(df_out)} item details to {output_file}")
+    return df_out
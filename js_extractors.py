@@ -0,0 +1,378 @@
+# in-page extractors: run inside the browser via execute_script and return compact JSON
+#
+# Each extractor mirrors the BeautifulSoup parsing of its detail script, so
+# a page that needs Chrome never has to ship its whole DOM back through
+# WebDriver (page_source) or be re-parsed with html.parser.
+
+# Shared helpers, prepended to every extractor (ports of the BeautifulSoup / Python calls they replace)
+HELPERS_JS = r"""
+// str.strip(): Python's whitespace (no \ufeff, but \x1c-\x1f and \x85)
+const PY_SPACE = '\\t\\n\\v\\f\\r \\x1c-\\x1f\\x85\\xa0\\u1680\\u2000-\\u200a\\u2028\\u2029\\u202f\\u205f\\u3000';
+const STRIP = new RegExp('^[' + PY_SPACE + ']+|[' + PY_SPACE + ']+$', 'g');
+const strip = t => t.replace(STRIP, '');
+// Text nodes get_text() skips: script / style / ruby strings are not plain NavigableStrings
+const SKIPPED_TEXT = 'script, style, rt, rp';
+const textNodes = el => {
+    const nodes = [];
+    const walker = document.createTreeWalker(el, NodeFilter.SHOW_TEXT);
+    for (let node = walker.nextNode(); node; node = walker.nextNode()) {
+        const container = node.parentElement.closest(SKIPPED_TEXT);
+        if (!container || container === el) nodes.push(node.data);
+    }
+    return nodes;
+};
+// el.get_text(sep, strip=True): every text node stripped, empty ones dropped, joined with sep
+const txt = (el, sep = '') => el ? textNodes(el).map(strip).filter(Boolean).join(sep) : null;
+// el.get_text(): the text nodes as they are
+const rawText = el => el ? textNodes(el).join('') : null;
+// tag.string: the only text (or comment) of a tag, followed down single-child tags
+const onlyString = el => {
+    while (el.childNodes.length === 1 && el.firstChild.nodeType === Node.ELEMENT_NODE) el = el.firstChild;
+    const node = el.childNodes.length === 1 ? el.firstChild : null;
+    return node && (node.nodeType === Node.TEXT_NODE || node.nodeType === Node.COMMENT_NODE) ? node.data : null;
+};
+// icon_name(): os.path.splitext(os.path.basename(src))[0]
+const iconName = src => {
+    const name = src.split('/').pop();
+    const dot = name.lastIndexOf('.');
+    const first = name.search(/[^.]/);
+    return first !== -1 && dot > first ? name.slice(0, dot) : name;
+};
+// Field("img", attr="src", convert=icon_name)
+const iconOf = img => {
+    const src = img ? img.getAttribute('src') : null;
+    return src === null ? null : iconName(src);
+};
+// int(text), null where Python raises ValueError
+const pyInt = t => {
+    t = strip(String(t));
+    return /^[+-]?\d+(_\d+)*$/.test(t) ? parseInt(t.replace(/_/g, ''), 10) : null;
+};
+const snakeCase = t => t.toLowerCase().replace(/[^a-z0-9]+/g, '_').replace(/^_+|_+$/g, '');
+const idFrom = (href, kind) => {
+    const m = (href || '').match(new RegExp('/' + kind + '/(\\d+)-'));
+    return m ? parseInt(m[1], 10) : null;
+};
+const allTds = Array.from(document.querySelectorAll('td'));
+// soup.find("td", string=re.compile(label, re.I)) → the td after it (find_next)
+const valueCellFor = label => {
+    const re = new RegExp(label, 'i');
+    const i = allTds.findIndex(td => {
+        const s = onlyString(td);
+        return s !== null && re.test(s);
+    });
+    return i !== -1 && i + 1 < allTds.length ? allTds[i + 1] : null;
+};
+// Port of clean_number() from the detail scripts
+const cleanNumber = value => {
+    if (value === null || value === undefined) return null;
+    let t = strip(String(value)).replace(/\u00A0/g, '').replace(/ /g, '');
+    t = t.replace(/,/g, '.');
+    t = t.replace(/(?<=\d)\.(?=\d{3}(\D|$))/g, '');
+    t = t.replace(/[^\d.]/g, '');
+    if (t === '') return null;
+    const n = Number(t);
+    return Number.isNaN(n) ? null : n;
+};
+// Port of level_bounds()
+const levelRange = text => {
+    if (text.includes('~')) {
+        const parts = text.split('~').map(strip);
+        return parts.length === 2 ? [cleanNumber(parts[0]), cleanNumber(parts[1])] : [null, null];
+    }
+    return [cleanNumber(text), null];
+};
+"""
+
+# Same columns as get_items_details.py; arguments[0] is its STAT_NAME_MAP
+ITEM_DETAILS_JS = HELPERS_JS + r"""
+const statNameMap = arguments[0] || {};
+const $ = sel => document.querySelector(sel);
+const $$ = (sel, root) => Array.from((root || document).querySelectorAll(sel));
+const out = {};
+
+// --- Basic info ---
+let itemName = txt($('#result-title .item-name__content'));
+const grade = txt($('#result-title .item-grade'));
+if (grade && itemName && itemName.endsWith(grade)) itemName = strip(itemName.slice(0, -grade.length));
+out.item_name = itemName;
+out.item_grade = grade;
+const icon = $('#result-title .item-icon img');
+const iconSrc = icon ? icon.getAttribute('src') : null;
+out.item_icon = iconSrc ? iconName(iconSrc) : null;
+out.chronicle = txt($('#server-tabs .nav-link.active'));
+
+// --- Recipes ---
+const recipes = [];
+const recipeCell = valueCellFor('Recipes');
+if (recipeCell) {
+    for (const a of $$('a.item-name', recipeCell)) {
+        const href = a.getAttribute('href');
+        let name = txt(a.querySelector('.item-name__content'), ' ');
+        if (name) {
+            name = strip(name.replace(/^Recipe:\s*/i, '').replace(/\(\d+%?\)/g, ''));
+            name = strip(name.replace(/\b(NG|D|C|B|A|S)\b$/, ''));
+        }
+        const chance = rawText(a).match(/\((\d+)%\)/);
+        recipes.push({
+            recipe_id: idFrom(href, 'item'),
+            recipe_name: name,
+            recipe_icon: iconOf(a.querySelector('img')),
+            recipe_grade: txt(a.querySelector('.item-grade')),
+            recipe_chance: chance ? parseInt(chance[1], 10) : null,
+            recipe_link: href || ''
+        });
+    }
+}
+out.recipes = recipes.length ? recipes : null;
+
+// --- Stats table ---
+const stats = {};
+for (const tr of $$('#result-stats table tr')) {
+    const tds = $$('td', tr);
+    if (tds.length !== 2) continue;
+    const keyRaw = txt(tds[0]);
+    const key = statNameMap[keyRaw] || snakeCase(keyRaw);
+    const valRaw = txt(tds[1], ' ');
+    if (key === 'item_skills') continue;
+
+    if (key === 'soul_spirit_shots_consumption') {
+        let soulshot = null, spiritshot = null;
+        if (valRaw.includes('/')) {
+            const [soul, spirit] = valRaw.split('/').map(pyInt);
+            if (soul !== null && spirit !== null) {
+                soulshot = soul > 0 ? soul : null;
+                spiritshot = spirit > 0 ? spirit : null;
+            }
+        }
+        stats.soulshot_consumption = soulshot;
+        stats.spiritshot_consumption = spiritshot;
+        continue;
+    }
+
+    if (key === 'shield_defence') {
+        const main = valRaw.match(/(\d+)/);
+        if (main) stats.shield_defence_value = parseInt(main[1], 10);
+        const percent = tds[1].outerHTML.match(/\(([\d.,]+)%\)/);
+        const value = percent ? Number(percent[1].replace(/,/g, '.')) : NaN;
+        stats.shield_defence_percent = Number.isNaN(value) ? null : Math.trunc(value);
+        continue;
+    }
+
+    const clean = cleanNumber(valRaw);
+    stats[key] = clean !== null ? clean : valRaw;
+}
+delete stats.recipes;
+const typeParts = stats.type ? String(stats.type).split('/').map(strip) : [];
+stats.type = typeParts.length > 0 ? typeParts[0] : null;
+stats.subtype = typeParts[1] ? typeParts[1].replace(/^[{}]+|[{}]+$/g, '').toLowerCase() : null;
+out.stats = stats;
+
+// --- Item Skills ---
+const itemSkills = [];
+const skillsCell = valueCellFor('Item skills');
+if (skillsCell) {
+    for (const a of $$('a.item-name', skillsCell)) {
+        const link = a.getAttribute('href');
+        const fullText = txt(a.querySelector('.item-name__content'), ' ');
+        const level = (fullText || '').match(/Lv\.\s*(\d+)/);
+        itemSkills.push({
+            id: idFrom(link, 'skill'),
+            name: fullText === null ? null : strip(strip(fullText.replace(/Lv\.\s*\d+/g, '')).replace(/\(Grade\s+[A-D|S\d+]*\)/gi, '')),
+            icon: iconOf(a.querySelector('img')),
+            level: level ? parseInt(level[1], 10) : null,
+            link: link || ''
+        });
+    }
+}
+out.item_skills = itemSkills.length ? itemSkills : null;
+
+// --- Item Description ---
+// get_text("\n", strip=True) after <br> → "\n": every text node on its own line
+out.item_description = null;
+out.item_description_json = null;
+const description = $("#result-title div[style*='margin-left'] p");
+if (description) {
+    const rawDescription = txt(description, '\n');
+    out.item_description = rawDescription || null;
+    const lines = rawDescription.split('\n').map(strip).filter(Boolean);
+    const effects = [];
+    let statType = null, hasHeader = false;
+    for (const line of lines) {
+        if (line.startsWith('<') && line.endsWith('>')) {
+            statType = strip(line.replace(/^[<>]+|[<>]+$/g, ''));
+            hasHeader = true;
+            continue;
+        }
+        if (!hasHeader) continue;
+        const m = line.match(/^([\s\S]*?):\s*([\s\S]*)$/);  // re.match(r"^(.*?):\s*(.*)$")
+        const desc = m ? strip(m[2]) : line;
+        if (desc.toLowerCase().startsWith('<font')) continue;
+        if (desc) effects.push({type: m ? strip(m[1]) : null, description: desc});
+    }
+    if (hasHeader && effects.length) out.item_description_json = [{stat_type: statType, list: effects}];
+}
+
+// --- Restrictions ---
+const restrictions = {};
+const restrictionsRow = $$('#result-stats table tr').find(tr => {
+    const first = tr.querySelector('td');
+    return first && rawText(first).includes('Restrictions');
+});
+if (restrictionsRow) {
+    for (const span of $$('td span', restrictionsRow)) {
+        const text = txt(span);
+        if (text) restrictions[snakeCase(text)] = !!span.querySelector('.fa-check');
+    }
+}
+out.restrictions = Object.keys(restrictions).length ? restrictions : null;
+
+// --- Drops ---
+const drops = [];
+for (const tr of $$('#drop table tbody tr')) {
+    const cols = $$('td', tr);
+    if (cols.length !== 3) continue;
+    const npcLink = cols[0].querySelector('a.item-name');
+    const href = npcLink ? npcLink.getAttribute('href') : null;
+    let npcName = txt(cols[0].querySelector('.item-name__content'), ' ');
+    if (npcName !== null) npcName = strip(npcName.replace(/Lv\.\s*\d+/g, ''));
+    const level = (txt(cols[0].querySelector('.item-name__additional')) || '').match(/Lv\.\s*(\d+)/);
+    const amount = strip(txt(cols[1]).replace(/[^\d\- ]/g, ''));
+    drops.push({
+        npc_id: idFrom(href, 'npc'),
+        npc_name: npcName,
+        npc_level: level ? parseInt(level[1], 10) : null,
+        npc_link: href,
+        amount: amount || null,
+        chance: cleanNumber(strip(txt(cols[2]).replace(/%/g, '')))
+    });
+}
+out.drops = drops.length ? drops : null;
+
+// --- Crystals ---
+const crystals = [];
+for (const tr of $$('#crystals table tbody tr')) {
+    const cols = $$('td', tr);
+    if (cols.length === 3) {
+        crystals.push({
+            modification: cleanNumber(txt(cols[0])),
+            crystallization: cleanNumber(txt(cols[1])),
+            fail: cleanNumber(txt(cols[2]))
+        });
+    }
+}
+out.crystals = crystals.length ? crystals : null;
+
+// --- Quest Rewards / Quest Goal ---
+const questRows = (sel, withId) => {
+    const rows = [];
+    for (const tr of $$(sel)) {
+        const cols = $$('td', tr);
+        if (cols.length !== 2) continue;
+        const a = cols[0].querySelector('a.item-name');
+        const href = a ? a.getAttribute('href') : null;
+        const [levelMin, levelMax] = levelRange(txt(cols[1]));
+        const quest = {quest_name: txt(cols[0], ' '), quest_link: href, level_min: levelMin, level_max: levelMax};
+        rows.push(withId ? Object.assign({quest_id: idFrom(href, 'quest')}, quest) : quest);
+    }
+    return rows.length ? rows : null;
+};
+out.quest_rewards = questRows('#questreward table tbody tr', true);
+out.quest_goal = questRows('#questGoal table tbody tr', false);
+
+// --- Contained Items ---
+const contained = [];
+for (const tr of $$('#contained table tbody tr')) {
+    const td = tr.querySelector('td');
+    if (!td) continue;
+    const a = td.querySelector('a.item-name');
+    const href = a ? a.getAttribute('href') : null;
+    let name = txt(td.querySelector('a.item-name .item-name__content'), ' ');
+    const itemGrade = txt(td.querySelector('a.item-name .item-grade'));
+    // name[: -len(grade)], so an empty grade empties the name as in without_grade()
+    if (itemGrade !== null && name !== null && name.endsWith(itemGrade)) name = strip(name.slice(0, -itemGrade.length));
+    const chance = rawText(td).match(/\(([\d.,]+)\)/);
+    contained.push({
+        id: idFrom(href, 'item'),
+        name: name,
+        grade: itemGrade,
+        icon: iconOf(td.querySelector('img')),
+        chance: chance ? cleanNumber(chance[1]) : null,
+        link: href
+    });
+}
+out.contained = contained.length ? contained : null;
+
+// --- Soul Crystals ---
+const soulCrystals = [];
+const soulCell = valueCellFor('Soul Crystals');
+if (soulCell) {
+    for (const block of $$('div.collapser > div', soulCell)) {
+        const main = block.querySelector('a.item-name');
+        if (!main) continue;
+
+        const materials = [];
+        let materialContainer = block.nextElementSibling;
+        while (materialContainer && materialContainer.tagName !== 'DIV') materialContainer = materialContainer.nextElementSibling;
+        if (materialContainer) {
+            for (const mat of $$('a.item-name', materialContainer)) {
+                const matName = txt(mat.querySelector('.item-name__content'), ' ');
+                const amount = (matName || '').match(/\(([\d,\.]+)\s*pcs\)/);
+                materials.push({
+                    id: idFrom(mat.getAttribute('href'), 'item'),
+                    name: matName,
+                    icon: iconOf(mat.querySelector('img')),
+                    link: mat.getAttribute('href') || '',
+                    grade: txt(mat.querySelector('.item-grade')),
+                    amount: amount ? pyInt(amount[1]) : null
+                });
+            }
+        }
+
+        soulCrystals.push({
+            augmentation_item: {
+                id: idFrom(main.getAttribute('href'), 'item'),
+                name: txt(main.querySelector('.item-name__content'), ' '),
+                icon: iconOf(main.querySelector('img')),
+                link: main.getAttribute('href') || '',
+                effect: txt(main.querySelector('.item-name__additional')),
+                grade: txt(main.querySelector('.item-grade'))
+            },
+            materials: materials
+        });
+    }
+}
+out.soul_crystals = soulCrystals.length ? soulCrystals : null;
+
+// --- Set ---
+const sets = [];
+const setCell = valueCellFor('Set part');
+if (setCell) {
+    for (const a of $$('a.item-name', setCell)) {
+        const href = a.getAttribute('href');
+        let setName = txt(a.querySelector('.item-name__content'), ' ');
+        const pvp = setName !== null && setName.includes('{PvP}');
+        if (setName) {
+            setName = setName.replace(/\{PvP\}/g, '').replace(/[\-–]\s*Set/gi, '');
+            setName = strip(setName.replace(/\s*\b(NG|D|C|B|A|S)\b$/i, '').replace(/\s+/g, ' '));
+        }
+        const set = {
+            set_id: idFrom(href, 'set'),
+            set_name: setName,
+            set_icon: iconOf(a.querySelector('img')),
+            set_grade: txt(a.querySelector('.item-grade')),
+            set_class: txt(a.querySelector('.item-class')),
+            set_full_link: href || '',
+            pvp: pvp
+        };
+        if (!(set.set_id === null && !set.set_name && set.set_icon === null && set.set_grade === null)) sets.push(set);
+    }
+}
+out.item_set = sets.length ? sets : null;
+
+return out;
+"""
+
+EXTRACTORS = {
+    "item": ITEM_DETAILS_JS,
+}
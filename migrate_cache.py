@@ -0,0 +1,60 @@
+# copy the shared HTML cache between storage backends (e.g. directory tree → single SQLite file)
+# and optionally train a zstd dictionary / recompress the stored pages
+import argparse
+
+from html_cache import CACHE_ROOT, DICT_SAMPLES, HtmlCache, open_backend
+
+parser = argparse.ArgumentParser(description="Copy the HTML cache from one backend to another.")
+parser.add_argument("--root", default=CACHE_ROOT, help=f"Cache root (default: {CACHE_ROOT})")
+parser.add_argument("--src", default="dir", choices=["dir", "sqlite"], help="Backend to read (default: dir)")
+parser.add_argument("--dst", default="sqlite", choices=["dir", "sqlite"], help="Backend to write (default: sqlite)")
+parser.add_argument("--train-dict", action="store_true", help="Train a zstd dictionary on the pages (implies --recompress)")
+parser.add_argument("--samples", type=int, default=DICT_SAMPLES, help=f"Pages sampled for training (default: {DICT_SAMPLES})")
+parser.add_argument("--recompress", action="store_true", help="Re-encode the --dst objects with the current compression")
+args = parser.parse_args()
+
+if args.src == args.dst and not (args.train_dict or args.recompress):
+    parser.error("--src and --dst must differ (or pass --train-dict / --recompress to work in place)")
+
+
+def finish():
+    """Dictionary training and recompression of the --dst store."""
+    if not (args.train_dict or args.recompress):
+        return
+    cache = HtmlCache(args.root, backend=args.dst)
+    if args.train_dict:
+        cache.train_dictionary(args.samples)
+    cache.recompress()
+    cache.close()
+
+
+if args.src == args.dst:
+    finish()
+    raise SystemExit
+
+src = open_backend(args.src, args.root)
+dst = open_backend(args.dst, args.root)
+
+print(f"📦 Migrating {args.root}: {args.src} → {args.dst}")
+refs = objects = missing = 0
+for key, ref in src.iter_refs():
+    digest = ref["hash"]
+    if not dst.has_object(digest):
+        data = src.read_object(digest)
+        if data is None:
+            print(f"⚠️ Object {digest} of {ref['url']} is missing — skipped.")
+            missing += 1
+            continue
+        dst.write_object(digest, data)
+        objects += 1
+    dst.write_ref(ref["chronicle"], key, ref)
+    refs += 1
+    if refs % 1000 == 0:
+        print(f"  … {refs} refs copied")
+
+src.close()
+dst.close()
+print(f"✅ Copied {refs} refs and {objects} objects ({missing} refs skipped).")
+finish()
+print(f"👉 Set BACKEND = \"{args.dst}\" in html_cache.py to use the new store.")
+print("ℹ️ Old per-script cache folders are imported into whichever backend is active on first read.")
@@ -0,0 +1,246 @@
+# per-page-type registry: when is a page "ready", instead of sleeping a fixed time
+import html as html_lib
+import re
+import threading
+import time
+from collections import defaultdict
+from functools import lru_cache
+from bs4 import BeautifulSoup
+from rate_limiter import is_rate_limited
+
+# --- Config ---
+PAGE_LOAD_STRATEGY = "eager"  # driver.get returns at DOMContentLoaded, not after every image/script
+READY_TIMEOUT = 15            # seconds before giving up on a ready condition
+POLL_INTERVAL = 0.05          # seconds between condition checks
+MIN_PAGE_SIZE = 2000          # bytes; smaller bodies are error stubs, never cached
+
+# Page type → CSS selector that exists once the data we parse is in the DOM
+READY_SELECTORS = {
+    "item": "#result-stats",
+    "skill": "#result-title",
+    "npc": "#result-stats",
+    "quest": "#result-title",
+    "recipe": "#result-stats",
+    "races": "div#races-row",
+    "class": "#class-heading h1",
+    "class_skills": "a.skill-level-link",
+    "class_level": "table.table-skills tbody tr",
+    "class_summary": "#active",
+    "quest_list": "a.item-name",
+    "recipe_list": "table.table tbody tr",
+    "npc_list": "table.table-vcenter",
+    "page": "body",
+}
+
+# Per-type minimum sizes where a real page is known to be larger than MIN_PAGE_SIZE
+MIN_PAGE_SIZES = {
+    "class": 5000,
+    "class_skills": 5000,
+    "class_level": 5000,
+    "class_summary": 5000,
+}
+
+# Page type → the regions parsers read; html_cache's trimmed mode keeps only these
+REGIONS = {
+    "item": ["#server-tabs", "#result-title", "#result-stats", "#drop", "#spoil", "#crystals",
+             "#questreward", "#questGoal", "#contained"],
+    "skill": ["#result-title", "#result-stats", "table.table-vcenter"],
+    "npc": ["#result-title", "#result-stats", "#drop", "#spoil", "#skills", "#map"],
+    "class": ["#class-heading", "#class-desc__text", "#class-summary__table", "#class-image",
+              "div#race-class__list", "a.nav-link", "a.skill-level-link"],
+    "class_level": ["table.table-skills"],
+    "class_summary": ["#active", "#passive"],
+}
+
+# Page types whose extractors walk past any fixed region (quest steps take the next
+# links wherever they are, recipe sections are h5 ~ table siblings): never trimmed
+# and always parsed whole
+WHOLE_PAGE_TYPES = ("quest", "recipe")
+
+# Page type → inline scripts a trimmed page keeps (regex on the script text)
+REGION_SCRIPTS = {
+    "class": re.compile(r"window\._classData|data\s*:\s*\["),
+}
+
+# Page types whose URLs map to the same cache key (recipe pages are /item/ pages);
+# a trimmed page keeps the regions of every type in its group
+SHARED_KEYS = [
+    ("item", "recipe"),
+]
+
+# Requests Chrome never needs to make (Network.setBlockedURLs wildcards):
+# stylesheets, fonts, media and third-party tracking/ad scripts.
+BLOCK_ALWAYS = [
+    "*.css", "*.css?*",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico", "*.mp4", "*.webm",
+    "*googletagmanager.com*", "*google-analytics.com*", "*doubleclick.net*",
+    "*googlesyndication.com*", "*mc.yandex.ru*", "*facebook.net*", "*hotjar.com*",
+]
+
+# Extra blocks per page type, on top of BLOCK_ALWAYS. Class detail pages are
+# parsed from the server HTML (inline _classData included), so they need no
+# scripts at all; class skill pages keep the wiki's own scripts because
+# get_races_classes_skills.py clicks their tabs.
+BLOCKED_URLS = {
+    "class": ["*.js", "*.js?*"],
+}
+
+# A navigation is marked on the old window object, so the mark disappears
+# together with the old document.
+MARK_JS = "window.__pageReadyPending = true;"
+
+READY_JS = """
+if (window.__pageReadyPending) return false;
+if (document.title.indexOf('429') !== -1) return true;
+return document.querySelector(arguments[0]) !== null;
+"""
+
+_stats = defaultdict(list)
+_stats_lock = threading.Lock()
+
+
+def register_page_type(page_type, selector):
+    """Add or override the ready selector of a page type."""
+    selector_patterns(selector)  # unsupported selectors fail here, not on the first put
+    READY_SELECTORS[page_type] = selector
+
+
+def validate_page(html, page_type, status=200):
+    """Why html must not be cached (status, 429 page, too small, ready selector missing), or None if it's fine."""
+    if status != 200:
+        return f"HTTP {status}"
+    if is_rate_limited(html):
+        return "429 page"
+    min_size = MIN_PAGE_SIZES.get(page_type, MIN_PAGE_SIZE)
+    if len(html) < min_size:
+        return f"only {len(html)} bytes (< {min_size})"
+    selector = READY_SELECTORS[page_type]
+    if not all(pattern.search(html) for pattern in selector_patterns(selector)):
+        return f"missing {selector}"
+    return None
+
+
+@lru_cache(maxsize=None)
+def selector_patterns(selector):
+    """Regexes for every tag, #id and .class of a READY_SELECTORS selector, checked on the raw HTML.
+
+    Each must appear somewhere in the page, like fetcher.has_element_ids;
+    that is cheap and never rejects a page the browser's selector matches.
+    """
+    patterns = []
+    for compound in re.split(r"\s*[\s>+~]\s*", selector.strip()):
+        m = re.match(r"([a-z][a-z0-9]*)?((?:[#.][\w-]+)*)$", compound, re.I)
+        if not m:
+            raise ValueError(f"Unsupported ready selector {selector!r}")
+        if m.group(1):
+            patterns.append(re.compile(rf"<{m.group(1)}[\s>/]", re.I))
+        for kind, value in re.findall(r"([#.])([\w-]+)", m.group(2)):
+            if kind == "#":
+                patterns.append(re.compile(rf"""\bid=["']?{re.escape(value)}["'\s>]"""))
+            else:
+                patterns.append(re.compile(rf"""\bclass=["']?(?:[^"'>]*\s)?{re.escape(value)}(?=[\s"'>])"""))
+    return tuple(patterns)
+
+
+def trim_types(page_type):
+    """The page types a trimmed page_type page is kept for: its SHARED_KEYS group, or just itself."""
+    for group in SHARED_KEYS:
+        if page_type in group:
+            return group
+    return (page_type,)
+
+
+def trim_page(html, page_type):
+    """Only the REGIONS (and REGION_SCRIPTS) of trim_types(page_type) in html, in document order.
+
+    html itself if none are registered or one of them is in WHOLE_PAGE_TYPES.
+    """
+    types = trim_types(page_type)
+    if any(t in WHOLE_PAGE_TYPES for t in types):
+        return html
+    selectors = list(dict.fromkeys(selector for t in types for selector in REGIONS.get(t, ())))
+    if not selectors:
+        return html
+    soup = BeautifulSoup(html, "html.parser")
+    wanted = set()
+    for selector in selectors:
+        wanted.update(id(el) for el in soup.select(selector))
+    script_patterns = [REGION_SCRIPTS[t] for t in types if t in REGION_SCRIPTS]
+    if script_patterns:
+        wanted.update(id(el) for el in soup.find_all("script")
+                      if any(pattern.search(el.get_text()) for pattern in script_patterns))
+
+    kept = []
+    for el in soup.find_all(True):
+        # Nested matches are already inside their kept ancestor
+        if id(el) in wanted and not any(id(parent) in wanted for parent in el.parents):
+            kept.append(str(el))
+    title = html_lib.escape(soup.title.get_text()) if soup.title else ""
+    return f"<html><head><title>{title}</title></head><body>\n" + "\n".join(kept) + "\n</body></html>"
+
+
+def blocked_urls(page_type=None):
+    """URL patterns to block for page_type (BLOCK_ALWAYS plus its own extras)."""
+    return BLOCK_ALWAYS + BLOCKED_URLS.get(page_type, [])
+
+
+def block_requests(driver, page_type=None):
+    """Make Chrome drop page_type's blocked requests via the DevTools protocol (current tab)."""
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": blocked_urls(page_type)})
+        return True
+    except Exception as e:
+        print(f"⚠️ Request blocking not available: {e}")
+        return False
+
+
+def mark_navigation(driver):
+    """Call before a click that navigates, so the old page never counts as ready."""
+    driver.execute_script(MARK_JS)
+
+
+def wait_until_ready(driver, page_type, timeout=READY_TIMEOUT):
+    """Poll until page_type's selector is present (or a 429 page shows); True if it became ready."""
+    selector = READY_SELECTORS[page_type]
+    start = time.monotonic()
+    ready = False
+    while True:
+        try:
+            ready = bool(driver.execute_script(READY_JS, selector))
+        except Exception:
+            pass  # the document is being swapped; try again
+        if ready or time.monotonic() - start > timeout:
+            break
+        time.sleep(POLL_INTERVAL)
+
+    elapsed = time.monotonic() - start
+    with _stats_lock:
+        _stats[page_type].append(elapsed if ready else None)
+    if not ready:
+        print(f"⚠️ '{page_type}' page not ready after {timeout}s ({selector}) — continuing.")
+    return ready
+
+
+def ready_stats():
+    """Return {page_type: {"pages", "timeouts", "avg", "max"}} of time-to-ready in seconds."""
+    with _stats_lock:
+        snapshot = {page_type: list(times) for page_type, times in _stats.items()}
+    summary = {}
+    for page_type, times in snapshot.items():
+        ready = [t for t in times if t is not None]
+        summary[page_type] = {
+            "pages": len(times),
+            "timeouts": len(times) - len(ready),
+            "avg": sum(ready) / len(ready) if ready else None,
+            "max": max(ready) if ready else None,
+        }
+    return summary
+
+
+def print_ready_stats():
+    """Print time-to-ready per page type."""
+    for page_type, s in ready_stats().items():
+        timing = f"ready in avg {s['avg']:.2f}s, max {s['max']:.2f}s" if s["avg"] is not None else "never ready"
+        print(f"⏱️ {page_type}: {s['pages']} pages, {timing}, {s['timeouts']} timeouts")
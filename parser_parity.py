@@ -0,0 +1,223 @@
+# parser backend parity: run every extractor over cached pages with each HTML parser and diff the rows
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+import html_parser
+from html_cache import BACKEND, CACHE_ROOT, HtmlCache
+from item_extractor import EXTRACT_VARIANT, parse_item_page
+from skill_extractor import parse_skill_level, parse_skill_main
+from npc_extractor import parse_npc_page
+from quest_extractor import parse_quest_page
+from recipe_extractor import parse_recipe_page
+from class_extractor import parse_all_skills, parse_class_level, parse_class_page, parse_level_links, parse_race_tree
+
+
+def class_rows(html, url, chronicle):
+    tree = parse_race_tree(html)
+    return {
+        "row": parse_class_page(html, "", "", chronicle, "", url),
+        "level_links": parse_level_links(html),
+        "tree": ET.tostring(tree, encoding="unicode") if tree is not None else None,
+    }
+
+
+# Page type → what its extractors return for one page (url / chronicle come from the cache ref)
+EXTRACTORS = {
+    "item": lambda html, url, chronicle: parse_item_page(html, 0, url),
+    "skill": lambda html, url, chronicle: (parse_skill_main(html, "", url), parse_skill_level(html)),
+    "npc": lambda html, url, chronicle: parse_npc_page(html, 0, "", url, chronicle),
+    "quest": lambda html, url, chronicle: parse_quest_page(html, 0, "", url, chronicle),
+    "recipe": lambda html, url, chronicle: parse_recipe_page(html, 0),
+    "class": class_rows,
+    "class_level": lambda html, url, chronicle: parse_class_level(html),
+    "class_summary": lambda html, url, chronicle: parse_all_skills(html),
+}
+
+parser = argparse.ArgumentParser(description="Check that every HTML parser backend gives identical extractor rows.")
+parser.add_argument("--parsers", nargs="+", default=html_parser.available_parsers(), choices=html_parser.PARSERS,
+                    help="Backends to compare; the first is the reference (default: all installed)")
+parser.add_argument("--full-pages", action="store_true",
+                    help="Only compare whole-page parses (default: also each backend's region parse against its own whole-page parse)")
+parser.add_argument("--type", action="append", dest="page_type", choices=list(EXTRACTORS), help="Only this page type (repeatable)")
+parser.add_argument("--per-type", type=int, default=25, help="Pages sampled per page type (default: 25, 0 = all)")
+parser.add_argument("--fixtures", help="Read pages from this fixture folder instead of the cache")
+parser.add_argument("--save-fixtures", help="Write the sampled pages to this folder (<type>/<n>.html + .json, rows in .rows.json)")
+parser.add_argument("--save-expected", action="store_true",
+                    help="Rewrite each fixture's expected rows (<n>.rows.json) from the reference backend's whole-page parse")
+parser.add_argument("--seed", type=int, default=0, help="Sampling seed (default: 0)")
+parser.add_argument("--root", default=CACHE_ROOT, help=f"Cache root (default: {CACHE_ROOT})")
+parser.add_argument("--backend", default=BACKEND, choices=["dir", "sqlite"], help=f"Cache backend (default: {BACKEND})")
+args = parser.parse_args()
+page_types = args.page_type or list(EXTRACTORS)
+
+
+def cache_pages():
+    """(page_type, url, chronicle, html) sampled from the cache."""
+    cache = HtmlCache(args.root, backend=args.backend)
+    refs = {}
+    for ref in cache.iter_refs():
+        if ref.get("page_type") in page_types and ref.get("variant", "") != EXTRACT_VARIANT:
+            refs.setdefault(ref["page_type"], []).append(ref)
+    rng = random.Random(args.seed)
+    pages = []
+    for page_type in page_types:
+        sample = refs.get(page_type, [])
+        if args.per_type and len(sample) > args.per_type:
+            sample = rng.sample(sample, args.per_type)
+        for ref in sample:
+            html = cache.read(ref)
+            if html is not None:
+                pages.append((page_type, ref["url"], ref["chronicle"], html))
+    cache.close()
+    return pages
+
+
+def fixture_pages(folder):
+    """Fixture pages, and the expected-rows file of each."""
+    pages = []
+    row_paths = []
+    for page_type in page_types:
+        type_dir = os.path.join(folder, page_type)
+        if not os.path.isdir(type_dir):
+            continue
+        for name in sorted(os.listdir(type_dir)):
+            if not name.endswith(".html"):
+                continue
+            with open(os.path.join(type_dir, name[:-5] + ".json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(os.path.join(type_dir, name), encoding="utf-8") as f:
+                pages.append((page_type, meta["url"], meta["chronicle"], f.read()))
+            row_paths.append(os.path.join(type_dir, name[:-5] + ".rows.json"))
+    return pages, row_paths
+
+
+def save_fixtures(folder, pages):
+    """Write pages as fixtures; return their expected-rows files (filled in after the runs)."""
+    counts = {}
+    row_paths = []
+    for page_type, url, chronicle, html in pages:
+        n = counts[page_type] = counts.get(page_type, 0) + 1
+        path = os.path.join(folder, page_type, f"{n:04d}")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".html", "w", encoding="utf-8") as f:
+            f.write(html)
+        with open(path + ".json", "w", encoding="utf-8") as f:
+            json.dump({"url": url, "chronicle": chronicle}, f)
+        row_paths.append(path + ".rows.json")
+    print(f"💾 Saved {len(pages)} fixture pages → {folder}")
+    return row_paths
+
+
+def save_expected(row_paths, outputs):
+    for path, rows in zip(row_paths, outputs):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(json.loads(rows), f, sort_keys=True, ensure_ascii=False, indent=1)
+            f.write("\n")
+    print(f"💾 Saved expected rows of {len(row_paths)} pages")
+
+
+def load_expected(path):
+    """Expected rows in extract()'s form, or None without a rows file."""
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.dumps(json.load(f), sort_keys=True, ensure_ascii=False, default=str)
+
+
+def extract(page_type, url, chronicle, html):
+    """Extractor output as comparable JSON (errors compare as their message)."""
+    try:
+        rows = EXTRACTORS[page_type](html, url, chronicle)
+    except Exception as e:
+        rows = {"error": f"{type(e).__name__}: {e}"}
+    return json.dumps(rows, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def first_difference(expected, actual):
+    """Path and values of the first field that differs between two extractor outputs."""
+    def walk(a, b, path):
+        if type(a) is not type(b):
+            return path, a, b
+        if isinstance(a, dict):
+            for key in sorted(set(a) | set(b)):
+                found = walk(a.get(key), b.get(key), f"{path}.{key}")
+                if found:
+                    return found
+        elif isinstance(a, list):
+            if len(a) != len(b):
+                return f"{path} (length)", len(a), len(b)
+            for i, (x, y) in enumerate(zip(a, b)):
+                found = walk(x, y, f"{path}[{i}]")
+                if found:
+                    return found
+        elif a != b:
+            return path, a, b
+        return None
+    return walk(json.loads(expected), json.loads(actual), "row")
+
+
+pages, row_paths = fixture_pages(args.fixtures) if args.fixtures else (cache_pages(), [])
+if not pages:
+    raise SystemExit("❌ No pages to compare (empty cache or fixture folder).")
+if args.save_fixtures:
+    row_paths = save_fixtures(args.save_fixtures, pages)
+modes = [False] if args.full_pages else [False, True]
+print(f"🔬 Comparing {', '.join(args.parsers)} ({'whole pages' if args.full_pages else 'whole pages and regions'}) "
+      f"on {len(pages)} pages ({', '.join(page_types)})")
+
+outputs = {}
+timings = {}
+for name in args.parsers:
+    for region_parse in modes:
+        html_parser.set_parser(name, region_parse=region_parse)
+        started = time.perf_counter()
+        outputs[name, region_parse] = [extract(*page) for page in pages]
+        timings[name, region_parse] = time.perf_counter() - started
+
+
+def label(run):
+    return f"{run[0]} ({'regions' if run[1] else 'whole'})"
+
+
+def compare(expected_outputs, expected_label, actual_run):
+    """Print every page whose output of actual_run differs from expected_outputs; return how many."""
+    differ = 0
+    for page, expected, actual in zip(pages, expected_outputs, outputs[actual_run]):
+        if expected is not None and expected != actual:
+            differ += 1
+            path, a, b = first_difference(expected, actual) or ("row", expected, actual)
+            print(f"❌ {label(actual_run)} ≠ {expected_label} on {page[0]} {page[1]}: {path}: {a!r} vs {b!r}")
+    return differ
+
+
+# Whole pages: every backend against the reference; regions: every backend against its own whole-page parse
+reference = args.parsers[0]
+mismatches = sum(compare(outputs[reference, False], label((reference, False)), (name, False)) for name in args.parsers[1:])
+if not args.full_pages:
+    mismatches += sum(compare(outputs[name, False], label((name, False)), (name, True)) for name in args.parsers)
+
+# Fixtures: every run against the committed expected rows, so a change breaking all backends alike still fails
+if row_paths and (args.save_fixtures or args.save_expected):
+    save_expected(row_paths, outputs[reference, False])
+elif row_paths:
+    expected_rows = [load_expected(path) for path in row_paths]
+    for path, rows in zip(row_paths, expected_rows):
+        if rows is None:
+            mismatches += 1
+            print(f"❌ No expected rows {path} (write them with --save-expected)")
+    mismatches += sum(compare(expected_rows, "expected rows", run) for run in outputs)
+
+for name in args.parsers:
+    for region_parse in modes:
+        seconds = timings[name, region_parse]
+        print(f"⏱️ {name} ({'regions' if region_parse else 'whole'}): {seconds:.2f}s "
+              f"({seconds / len(pages) * 1000:.1f} ms/page, {timings[reference, False] / seconds:.1f}x {reference} whole)")
+if mismatches:
+    print(f"❌ {mismatches} page outputs differ.")
+    sys.exit(1)
+print(f"✅ All backends give identical rows{' (matching the expected rows)' if row_paths else ''} on {len(pages)} pages.")
@@ -0,0 +1,120 @@
+# adaptive token-bucket rate limiter shared by every fetch path
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+# --- Config ---
+START_RATE = 2.0        # requests per second at start
+MIN_RATE = 0.2          # never go slower than this
+MAX_RATE = 20.0         # never go faster than this
+RATE_STEP = 0.05        # additive increase per healthy response
+BACKOFF_FACTOR = 0.5    # multiplicative decrease on 429/503
+BASE_DELAY = 2.0        # first pause after a throttle response (seconds)
+MAX_DELAY = 120.0       # cap for exponential pauses (seconds)
+THROTTLE_STATUSES = (429, 503)
+
+
+def is_rate_limited(html):
+    """Detect the wiki's 429 page when only the body is available (browser fetches)."""
+    if not html:
+        return False
+    return (
+        "<title>429 Too Many Requests</title>" in html
+        or "<h1>429 Too Many Requests</h1>" in html
+        or "429 Too Many Requests" in html[:200]
+    )
+
+
+def parse_retry_after(value):
+    """Return a Retry-After header (seconds or HTTP date) as seconds, or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveRateLimiter:
+    """Token bucket whose refill rate adapts to how the server responds.
+
+    Healthy responses raise the rate by RATE_STEP (up to MAX_RATE). A 429/503
+    halves it and pauses all callers for an exponentially growing, jittered
+    delay — or exactly Retry-After seconds when the server sends one.
+    """
+
+    def __init__(self, rate=START_RATE, min_rate=MIN_RATE, max_rate=MAX_RATE, step=RATE_STEP,
+                 backoff_factor=BACKOFF_FACTOR, base_delay=BASE_DELAY, max_delay=MAX_DELAY):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.step = step
+        self.backoff_factor = backoff_factor
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self.tokens = 1.0
+        self.last_refill = time.monotonic()
+        self.paused_until = 0.0
+        self.consecutive_throttles = 0
+        self.stats = {"requests": 0, "throttled": 0}
+        self._lock = threading.Lock()
+
+    @property
+    def current_rate(self):
+        return self.rate
+
+    def acquire(self):
+        """Block until the caller may send one request."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                else:
+                    # Refill, allowing at most one second of burst
+                    self.tokens = min(max(1.0, self.rate), self.tokens + (now - self.last_refill) * self.rate)
+                    self.last_refill = now
+                    if self.tokens >= 1.0:
+                        self.tokens -= 1.0
+                        self.stats["requests"] += 1
+                        return
+                    wait = (1.0 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def on_success(self):
+        """Record a healthy response: creep the rate up."""
+        with self._lock:
+            self.consecutive_throttles = 0
+            self.rate = min(self.max_rate, self.rate + self.step)
+
+    def on_throttle(self, retry_after=None):
+        """Record a 429/503: cut the rate and pause everyone; returns the pause length."""
+        with self._lock:
+            self.consecutive_throttles += 1
+            self.stats["throttled"] += 1
+            self.rate = max(self.min_rate, self.rate * self.backoff_factor)
+
+            if retry_after is not None:
+                delay = retry_after
+            else:
+                delay = min(self.max_delay, self.base_delay * 2 ** (self.consecutive_throttles - 1))
+                delay *= random.uniform(0.5, 1.5)  # jitter so parallel workers don't retry in lockstep
+
+            self.paused_until = max(self.paused_until, time.monotonic() + delay)
+            self.tokens = 0.0
+
+        print(f"🐢 Rate limited — pausing {delay:.1f}s, rate now {self.rate:.2f} req/s")
+        return delay
+
+    def on_response(self, status_code, retry_after_header=None):
+        """Feed an HTTP status back in; returns True if the request should be retried."""
+        if status_code in THROTTLE_STATUSES:
+            self.on_throttle(parse_retry_after(retry_after_header))
+            return True
+        self.on_success()
+        return False
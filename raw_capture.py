@@ -0,0 +1,62 @@
+# raw server HTML from Chrome: main-document response bodies via CDP instead of page_source
+import base64
+import json
+
+# Chrome must be started with this capability so the performance log carries Network events
+PERFORMANCE_LOG = {"performance": "ALL"}
+
+
+def enable_capture(options):
+    """Turn on the performance log that DocumentCapture reads (call before starting Chrome)."""
+    options.set_capability("goog:loggingPrefs", PERFORMANCE_LOG)
+    return options
+
+
+class DocumentCapture:
+    """Remember each tab's latest main-document response and fetch its original bytes.
+
+    page_source is the DOM after scripts ran, re-serialized by Chrome; the
+    body returned here is exactly what the server sent, so it matches an
+    HTTP fetch of the same page byte for byte.
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.documents = {}  # main frame id (== tab handle) → (request_id, url, status)
+        self.latest = None
+
+    def _drain(self):
+        try:
+            entries = self.driver.get_log("performance")
+        except Exception as e:
+            print(f"⚠️ Performance log not available (start Chrome with raw_capture.enable_capture): {e}")
+            return
+        for entry in entries:
+            event = json.loads(entry["message"])["message"]
+            if event.get("method") != "Network.responseReceived":
+                continue
+            params = event["params"]
+            # A document's own request has requestId == loaderId; the main frame's id is the tab's target id
+            if params.get("type") != "Document" or params.get("requestId") != params.get("loaderId"):
+                continue
+            document = (params["requestId"], params["response"]["url"], params["response"].get("status"))
+            self.documents[params.get("frameId")] = document
+            self.latest = document
+
+    def body(self):
+        """Original body of the current tab's main document, or None if it can't be captured."""
+        self._drain()
+        document = self.documents.get(self.driver.current_window_handle)
+        if document is None and len(self.documents) <= 1:
+            document = self.latest  # handle format doesn't match frame ids (older chromedriver)
+        if document is None:
+            return None
+
+        try:
+            result = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": document[0]})
+        except Exception as e:
+            print(f"⚠️ Could not read raw body of {document[1]}: {e}")
+            return None
+        if result.get("base64Encoded"):
+            return base64.b64decode(result["body"]).decode("utf-8", errors="replace")
+        return result["body"]
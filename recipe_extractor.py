@@ -0,0 +1,188 @@
+# recipe page → details row: extraction shared by get_recipes_details.py and the offline reparse
+import csv
+import html
+import json
+import os
+import re
+import pandas as pd
+from extract_spec import ITEM_ID, LEVEL, NPC_ID, Field, Record, Rows
+from html_parser import make_soup
+
+BASE_URL = "https://wiki.mw2.wiki"
+
+# --- Helper ---
+def clean_percent(val):
+    if val is None:
+        return ""
+    return re.sub(r"%", "", str(val)).strip()
+
+def url_chronicle(url):
+    return url.rstrip("/").split("/")[-1]  # .../item/1666-recipe-wooden-arrow/lu4
+
+def percent_value(text):
+    cleaned = clean_percent(text)
+    return float(cleaned) if cleaned != "" else 0.0
+
+
+# --- Drop / spoil rows (same layout in both tables) ---
+NPC_ROW = {
+    "npc": Record(None, {
+        "id": Field("a.item-name", attr="href", regex=NPC_ID, default=""),
+        "name": Field(".item-name__content", sep=" ", convert=lambda text: text.split("Lv.")[0].strip(), default=""),
+        "level": Field(".item-name__additional", strip=False, regex=LEVEL, convert=int),
+    }),
+    "amount": Field("td.text-center", default=""),
+    "chance": Field("td.text-end", convert=percent_value, default=0.0),
+}
+DROP_ROWS = Rows("#drop tbody tr", NPC_ROW)
+SPOIL_ROWS = Rows("#spoil tbody tr", NPC_ROW)
+
+
+def parse_recipe_page(html_source, recipe_id):
+    """Details row of one recipe page (required items, crafting result, drop and spoil lists)."""
+    soup = make_soup(html_source, "recipe")
+
+    # --- Name / Grade ---
+    name_tag = soup.select_one("#result-title .item-name__content")
+    raw_name = name_tag.get_text(strip=True) if name_tag else ""
+    name = re.sub(r"(NG|D|C|B|A|S)$", "", raw_name).strip()
+
+    grade_tag = soup.select_one("#result-title .item-grade")
+    grade = grade_tag.get_text(strip=True) if grade_tag else ""
+
+    # --- Description cleanup ---
+    desc_tag = soup.select_one("#result-title p")
+    description_json = "[]"
+    if desc_tag:
+        raw_desc = desc_tag.decode_contents()
+        raw_desc = html.unescape(raw_desc)
+        raw_desc = re.sub(r"<br\s*/?>", "\n", raw_desc, flags=re.I)
+        raw_desc = re.sub(r"<[^>]+>", "", raw_desc)
+        parts = [p.strip() for p in re.split(r"[\n\r]+", raw_desc) if p.strip()]
+        description_json = json.dumps(parts, ensure_ascii=False)
+
+    # --- Item stats ---
+    price_npc = weight = olympiad_usable = ""
+    restrictions_dict = {}
+    stats_rows = soup.select("#result-stats table tr")
+    for tr in stats_rows:
+        label = tr.select_one("td:first-child").get_text(strip=True)
+        value = tr.select_one("td:last-child").get_text(" ", strip=True)
+        if "Selling price" in label:
+            price_npc = re.sub(r"[^\d]", "", value)
+        elif "Weight" in label:
+            weight = value
+        elif "Olympiad" in label:
+            olympiad_usable = value
+        elif "Restrictions" in label:
+            for span in tr.select("span"):
+                text = span.get_text(strip=True)
+                key = re.sub(r"[^a-zA-Z0-9]+", "_", text).lower()
+                icon = span.select_one("i")
+                is_true = "fa-check" in icon.get("class", []) if icon else False
+                restrictions_dict[key] = is_true
+
+    # --- Required items (JSON array) ---
+    required_items = []
+    req_rows = soup.select("h5:contains('Required items') ~ table tr")
+    for tr in req_rows:
+        link_tag = tr.select_one("a.item-name")
+        item_href = link_tag.get("href") if link_tag else ""
+        full_link = f"{BASE_URL}{item_href}" if item_href else ""
+        item_id_match = ITEM_ID.search(item_href)
+        item_id = item_id_match.group(1) if item_id_match else ""
+
+        item_name_tag = tr.select_one(".item-name__content")
+        item_name = re.sub(r"(NG|D|C|B|A|S)$", "", item_name_tag.get_text(strip=True)).strip() if item_name_tag else ""
+
+        item_grade_tag = tr.select_one(".item-grade")
+        item_grade = item_grade_tag.get_text(strip=True) if item_grade_tag else ""
+
+        qty_td = tr.select_one("td.text-end")
+        qty = qty_td.get_text(strip=True) if qty_td else ""
+
+        icon_tag = tr.select_one(".item-icon img")
+        icon_src = icon_tag.get("src") if icon_tag else ""
+        icon_filename = os.path.splitext(os.path.basename(icon_src))[0] if icon_src else ""
+
+        required_items.append({
+            "id": item_id,
+            "name": item_name,
+            "icon": icon_filename,
+            "grade": item_grade,
+            "quantity": qty,
+            "link": full_link
+        })
+
+    # --- Crafting details ---
+    craft_level = mp_consumption = result_item_name = result_item_grade = result_quantity = ""
+    chance_of_success = ""
+    result_item_id = ""
+    result_item_link = ""
+    detail_rows = soup.select("h5:contains('Details') ~ table tr")
+    for tr in detail_rows:
+        label = tr.select_one("td:first-child").get_text(strip=True)
+        value_td = tr.select_one("td:last-child")
+        value = value_td.get_text(" ", strip=True) if value_td else ""
+        if label == "Level":
+            craft_level = value
+        elif label == "MP Consumption":
+            mp_consumption = value
+        elif label == "Result":
+            res_link_tag = value_td.select_one("a.item-name")
+            res_href = res_link_tag.get("href") if res_link_tag else ""
+            result_item_link = f"{BASE_URL}{res_href}" if res_href else ""
+            match_id = ITEM_ID.search(res_href)
+            result_item_id = match_id.group(1) if match_id else ""
+
+            # Name and grade
+            res_name_tag = value_td.select_one(".item-name__content")
+            if res_name_tag:
+                # Extract grade separately
+                res_grade_tag = res_name_tag.select_one(".item-grade")
+                result_item_grade = res_grade_tag.get_text(strip=True) if res_grade_tag else ""
+                if res_grade_tag:
+                    res_grade_tag.extract()
+
+                result_item_text = res_name_tag.get_text(" ", strip=True)
+                match_qty = re.search(r"x(\d+)", result_item_text)
+                result_quantity = match_qty.group(1) if match_qty else ""
+                result_item_name = re.sub(r"x\d+", "", result_item_text).strip()
+        elif "Chance" in label:
+            chance_of_success = clean_percent(value)  # ✅ cleaned
+
+    return {
+        "id": recipe_id,
+        "name": name,
+        "grade": grade,
+        "description": description_json,
+        "price_npc": price_npc,
+        "weight": weight,
+        "olympiad_usable": olympiad_usable,
+        "restrictions": json.dumps(restrictions_dict, ensure_ascii=False),
+        "required_items": json.dumps(required_items, ensure_ascii=False),
+        "craft_level": craft_level,
+        "mp_consumption": mp_consumption,
+        "result_item_name": result_item_name,
+        "result_item_grade": result_item_grade,
+        "result_item_id": result_item_id,
+        "result_item_link": result_item_link,
+        "result_quantity": result_quantity,
+        "chance_of_success": chance_of_success,
+        "drop_list": json.dumps(DROP_ROWS(soup), ensure_ascii=False),
+        "spoil_list": json.dumps(SPOIL_ROWS(soup), ensure_ascii=False)
+    }
+
+
+def write_recipes_tsv(details, output_file):
+    """Save the recipe rows as TSV; return the DataFrame."""
+    df = pd.DataFrame(details)
+    df.to_csv(
+        output_file,
+        sep="\t",
+        index=False,
+        quoting=csv.QUOTE_NONE,
+        escapechar="\\",
+        encoding="utf-8"
+    )
+    return df
@@ -0,0 +1,377 @@
+# offline reparse: rebuild an entity's details TSV/XML from the HTML cache only — no Chrome, no network
+import argparse
+import json
+import os
+import re
+import sys
+import xml.etree.ElementTree as ET
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import pandas as pd
+
+from html_cache import BACKEND, CACHE_ROOT, CacheReader, HtmlCache
+import html_parser
+from item_extractor import EXTRACT_VARIANT, item_cache_file, item_extract_file, item_row_from_js, parse_item_page, write_items_tsv
+from skill_extractor import legacy_cache_file as skill_cache_file, parse_skill_level, parse_skill_main, skill_row
+from npc_extractor import chronicle_url, parse_npc_page, write_npc_tsv
+from quest_extractor import parse_quest_page, quest_url, write_quests_tsv
+from recipe_extractor import parse_recipe_page, url_chronicle, write_recipes_tsv
+from class_extractor import (
+    SKILLS_CACHE_DIR, SUMMARY_VARIANT, add_level_node, legacy_cache_file as class_cache_file, parse_all_skills,
+    parse_class_level, parse_class_page, parse_level_links, parse_race_tree, safe_filename, write_classes_skills_xml,
+    write_race_tree, write_skills_summary_to_xml,
+)
+
+# --- Config: same inputs/outputs as the details scripts ({chronicle} is filled in) ---
+ENTITIES = {
+    "items": ("data/items/items_list.tsv", "data/items/items_details.tsv"),
+    "skills": ("data/skills/skills_list_{chronicle}.tsv", "data/skills/skills_details_{chronicle}.tsv"),
+    "npc": ("data/npc/npc_list.csv", "data/npc/npc_details.tsv"),
+    "quests": ("data/quests_list.tsv", "data/quests_details.tsv"),
+    "recipes": ("data/recipes/recipes_list.tsv", "data/recipes/recipes_details.tsv"),
+    "classes": ("data/races_classes/races_{chronicle}.tsv", "data/races_classes/races_details_{chronicle}.tsv"),
+    "class_skills": ("data/races_classes/races_details_{chronicle}.xml", "data/races_classes/races_classes_skills_{chronicle}.xml"),
+}
+DEFAULT_CHRONICLES = {"skills": "eternal", "npc": "lu4", "quests": "lu4", "classes": "lu4", "class_skills": "lu4"}
+WORKERS = os.cpu_count() or 1  # parser processes (1 = parse in this process)
+CHUNK_SIZE = 64                 # pages sent to a worker per task
+TASKS_PER_CHILD = 50            # tasks a worker runs before it is replaced, so its memory stays bounded
+
+
+# --- Pages: found in the cache index here, read and decompressed in the workers ---
+_reader = None  # this process's CacheReader (set by init_worker)
+
+
+def init_worker(parser, region_parse, root, backend):
+    """Set up a parser process: the HTML parser backend and its own read-only handle on the store."""
+    global _reader
+    html_parser.set_parser(parser, region_parse)
+    _reader = CacheReader(root, backend)
+
+
+def read_page(source):
+    """Body of a Pages.find source (runs in the worker that parses it)."""
+    return _reader.read_source(source)
+
+
+class Pages:
+    """Looks pages up in the cache index (main process only) and keeps the ones it doesn't have."""
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.missing = []  # pages the list references but the cache doesn't have
+
+    def find(self, url, chronicle, page_type, legacy_path=None, variant="", validate=True, note_missing=True):
+        """Source of url's cached body (stale or not) for read_page; None, noted as missing, if it was never cached."""
+        source = self.cache.locate(url, chronicle, variant, legacy_path, page_type, validate, stale_ok=True)
+        if source is None and note_missing:
+            self.missing.append(url)
+        return source
+
+
+# --- Parallel parsing ---
+def parse_chunk(func, jobs):
+    """func(*job) for each job of one chunk (runs in a worker); a page that fails to parse gives None."""
+    rows = []
+    for job in jobs:
+        try:
+            rows.append(func(*job))
+        except Exception as e:
+            print(f"⚠️ {func.__name__} failed: {e}")
+            rows.append(None)
+    return rows
+
+
+def parallel_map(func, jobs, worker_args, workers=WORKERS, chunk_size=CHUNK_SIZE):
+    """Yield func(*job) for every job, parsed in worker processes, in input order.
+
+    jobs is consumed lazily and at most 2 * workers chunks are in flight.
+    Jobs carry page sources, not bodies: each worker reads its own pages,
+    so the main process only walks the list and the cache index.
+    worker_args are init_worker's arguments.
+    """
+    jobs = iter(jobs)
+    chunks = iter(lambda: list(islice(jobs, chunk_size)), [])
+    if workers <= 1:
+        for chunk in chunks:
+            yield from parse_chunk(func, chunk)
+        return
+
+    # max_tasks_per_child (Python 3.11+) recycles workers; without it their memory only grows with the corpus
+    options = {"max_tasks_per_child": TASKS_PER_CHILD} if sys.version_info >= (3, 11) else {}
+    with ProcessPoolExecutor(workers, initializer=init_worker, initargs=worker_args, **options) as pool:
+        in_flight = deque()
+        for chunk in chunks:
+            in_flight.append(pool.submit(parse_chunk, func, chunk))
+            if len(in_flight) >= 2 * workers:
+                yield from in_flight.popleft().result()
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+
+def parsed(func, jobs, args):
+    """Rows of parallel_map that parsed."""
+    worker_args = (args.parser, not args.full_pages, args.root, args.backend)
+    return [row for row in parallel_map(func, jobs, worker_args, args.workers) if row is not None]
+
+
+def read_list(path, limit=None, sep="\t"):
+    df = pd.read_csv(path, sep=sep)
+    return df.head(limit) if limit else df
+
+
+# --- Entities: jobs found in the cache here, read and parsed in the workers ---
+def item_details(row, url, source, extract_source):
+    if extract_source is not None:
+        text = read_page(extract_source)
+        return item_row_from_js(row, url, json.loads(text)) if text is not None else None
+    html_source = read_page(source)
+    return parse_item_page(html_source, row["id"], url) if html_source is not None else None
+
+
+def reparse_items(args, pages):
+    df_items = read_list(args.input, args.limit)
+
+    def jobs():
+        for _, row in df_items.iterrows():
+            url = row["link"]
+            row_chronicle = row["chronicle"] if "chronicle" in df_items.columns else "default"
+            extract_source = pages.find(url, row_chronicle, "item", item_extract_file(url, row_chronicle),
+                                        EXTRACT_VARIANT, validate=False, note_missing=False)
+            if extract_source is not None:
+                yield row.to_dict(), url, None, extract_source
+                continue
+            source = pages.find(url, row_chronicle, "item", item_cache_file(url, row_chronicle))
+            if source is not None:
+                yield row.to_dict(), url, source, None
+
+    write_items_tsv(parsed(item_details, jobs(), args), args.output)
+
+
+def skill_main(row, source):
+    html_source = read_page(source)
+    if html_source is None:
+        return None
+    return row, parse_skill_main(html_source, row["skill_name"], row["skill_link"])
+
+
+def skill_level(row, main, lvl, source):
+    html_source = read_page(source)
+    if html_source is None:
+        return None
+    props = parse_skill_level(html_source)
+    return skill_row(row["skill_id"], row["skill_name"], row["skill_icon"], row["chronicle"], main, lvl, props)
+
+
+def reparse_skills(args, pages):
+    skills_df = read_list(args.input, args.limit)
+    skills_df.columns = (
+        skills_df.columns.str.strip()
+        .str.replace('\ufeff', '', regex=True)   # remove UTF-8 BOM
+        .str.replace('\u200b', '', regex=True)   # zero-width space
+        .str.replace('\xa0', '', regex=True)     # non-breaking space
+    )
+
+    def main_jobs():
+        for _, row in skills_df.iterrows():
+            source = pages.find(row["skill_link"], row["chronicle"], "skill",
+                                skill_cache_file(row["skill_name"], row["skill_id"], row["chronicle"], "main"))
+            if source is not None:
+                yield row.to_dict(), source
+
+    mains = [(row, main) for row, main in parsed(skill_main, main_jobs(), args) if main is not None]
+
+    def level_jobs():
+        for row, main in mains:
+            for lvl in main["level_links"]:
+                legacy_path = skill_cache_file(row["skill_name"], row["skill_id"], row["chronicle"], f"lv{lvl['level']}")
+                source = pages.find(lvl["link"], row["chronicle"], "skill", legacy_path)
+                if source is not None:
+                    yield row, main, lvl, source
+
+    df_out = pd.DataFrame(parsed(skill_level, level_jobs(), args))
+    df_out.to_csv(args.output, sep="\t", index=False)
+    print(f"\n✅ Saved {len(df_out)} skills to {args.output}")
+
+
+def npc_details(source, npc_id, name, url, chronicle):
+    html_source = read_page(source)
+    return parse_npc_page(html_source, npc_id, name, url, chronicle) if html_source is not None else None
+
+
+def reparse_npc(args, pages):
+    df = read_list(args.input, args.limit, sep=",")
+
+    def jobs():
+        for _, row in df.iterrows():
+            m = re.search(r"/npc/(\d+)-[^/]+/([^/]+)/?$", row["url"])
+            npc_id = int(m.group(1)) if m else None
+            url = chronicle_url(row["url"], args.chronicle)
+            source = pages.find(url, args.chronicle, "npc")
+            if source is not None:
+                yield source, npc_id, row["name"], url, args.chronicle
+
+    write_npc_tsv(parsed(npc_details, jobs(), args), args.output)
+
+
+def quest_details(source, quest_id, quest_name, url, chronicle):
+    html_source = read_page(source)
+    return parse_quest_page(html_source, quest_id, quest_name, url, chronicle) if html_source is not None else None
+
+
+def reparse_quests(args, pages):
+    quests_df = read_list(args.input, args.limit)
+
+    def jobs():
+        for _, row in quests_df.iterrows():
+            url = quest_url(row, args.chronicle)
+            source = pages.find(url, args.chronicle, "quest")
+            if source is not None:
+                yield source, row["ID"], row["Name"], url, args.chronicle
+
+    write_quests_tsv(parsed(quest_details, jobs(), args), args.output)
+
+
+def recipe_details(source, recipe_id):
+    html_source = read_page(source)
+    return parse_recipe_page(html_source, recipe_id) if html_source is not None else None
+
+
+def reparse_recipes(args, pages):
+    recipes_df = read_list(args.input, args.limit)
+
+    def jobs():
+        for _, row in recipes_df.iterrows():
+            source = pages.find(row["link"], url_chronicle(row["link"]), "recipe")
+            if source is not None:
+                yield source, row["id"]
+
+    df = write_recipes_tsv(parsed(recipe_details, jobs(), args), args.output)
+    print(f"✅ Done. {len(df)} recipe details saved to {args.output}")
+
+
+def class_details(source, race_name, subtype_name, chronicle, server_id, link):
+    html_source = read_page(source)
+    if html_source is None:
+        return None
+    return parse_class_page(html_source, race_name, subtype_name, chronicle, server_id, link)
+
+
+def reparse_classes(args, pages):
+    """Class rows are not translated offline: description_en / role / weapon / armor keep the page's text."""
+    df_input = read_list(args.input, args.limit)
+    last_page = []
+
+    def jobs():
+        for _, row in df_input.iterrows():
+            link, row_chronicle = str(row["subtype_link"]), str(row["chronicle"])
+            source = pages.find(link, row_chronicle, "class", class_cache_file(row))
+            if source is not None:
+                last_page[:] = [source]
+                yield source, str(row["race_name"]), str(row["subtype_name"]), row_chronicle, str(row["server_id"]), link
+
+    df_out = pd.DataFrame(parsed(class_details, jobs(), args))
+    df_out.to_csv(args.output, sep="\t", index=False)
+    print(f"✅ Saved {len(df_out)} details with stats to {args.output}")
+
+    # The race/class tree comes from the last class page, as in get_races_classes_details.py
+    html_source = read_page(last_page[0]) if last_page else None
+    root_elem = parse_race_tree(html_source, args.limit) if html_source is not None else None
+    if root_elem is not None:
+        write_race_tree(root_elem, os.path.splitext(args.output)[0] + ".xml")
+
+
+def reparse_class_skills(args, pages):
+    """A few dozen classes: read and parsed in this process, straight into the XML tree."""
+    root = ET.parse(args.input).getroot()
+    all_classes = [(c.attrib.get("name", ""), c.attrib["link"], c) for c in root.findall(".//class[@link]") if c.attrib["link"]]
+    if args.limit:
+        all_classes = all_classes[:args.limit]
+    legacy_dir = os.path.join(SKILLS_CACHE_DIR, args.chronicle)
+
+    def cached(url, page_type, legacy_path, variant=""):
+        source = pages.find(url, args.chronicle, page_type, legacy_path, variant)
+        return read_page(source) if source is not None else None
+
+    for class_name, class_url, class_node in all_classes:
+        safe_name = safe_filename(class_name)
+        page_html = cached(class_url, "class", os.path.join(legacy_dir, f"class_{safe_name}.html"))
+        if page_html is None:
+            continue
+        if "404" in page_html.lower() and ("not found" in page_html.lower() or "page not found" in page_html.lower()):
+            for p in root.iter():
+                if class_node in list(p):
+                    p.remove(class_node)
+                    break
+            continue
+
+        level_links = parse_level_links(page_html)
+        if level_links:
+            old_skills = class_node.find("skills")
+            if old_skills is not None:
+                class_node.remove(old_skills)
+            skills_node = ET.SubElement(class_node, "skills")
+            levels_added = 0
+            for level_num, level_url in level_links:
+                level_html = cached(level_url, "class_level", os.path.join(legacy_dir, f"class_{safe_name}_level_{level_num}.html"))
+                if level_html is not None and add_level_node(skills_node, level_num, parse_class_level(level_html)):
+                    levels_added += 1
+            if levels_added == 0:
+                class_node.remove(skills_node)
+
+        summary_html = cached(class_url, "class_summary", os.path.join(legacy_dir, f"class_{safe_name}_summary.html"),
+                              SUMMARY_VARIANT)
+        if summary_html is not None:
+            write_skills_summary_to_xml(class_node, parse_all_skills(summary_html))
+
+    write_classes_skills_xml(root, args.output)
+
+
+REPARSERS = {
+    "items": reparse_items,
+    "skills": reparse_skills,
+    "npc": reparse_npc,
+    "quests": reparse_quests,
+    "recipes": reparse_recipes,
+    "classes": reparse_classes,
+    "class_skills": reparse_class_skills,
+}
+
+parser = argparse.ArgumentParser(description="Rebuild details files from cached pages (no browser, no downloads).")
+parser.add_argument("entity", choices=list(ENTITIES), help="What to reparse")
+parser.add_argument("--chronicle", help="Chronicle of the list (skills/npc/quests/classes; items and recipes read it per row)")
+parser.add_argument("--input", help="List file (default: the details script's input)")
+parser.add_argument("--output", help="Output file (default: the details script's output)")
+parser.add_argument("--limit", type=int, help="Only the first N list entries")
+parser.add_argument("--parser", default=html_parser.PARSER, choices=html_parser.available_parsers(),
+                    help=f"HTML parser backend (default: {html_parser.PARSER})")
+parser.add_argument("--full-pages", action="store_true", help="Build the whole DOM instead of only each page type's regions")
+parser.add_argument("--workers", type=int, default=WORKERS, help=f"Parser processes (default: {WORKERS})")
+parser.add_argument("--root", default=CACHE_ROOT, help=f"Cache root (default: {CACHE_ROOT})")
+parser.add_argument("--backend", default=BACKEND, choices=["dir", "sqlite"], help=f"Cache backend (default: {BACKEND})")
+
+
+def main():
+    args = parser.parse_args()
+    args.chronicle = args.chronicle or DEFAULT_CHRONICLES.get(args.entity, "")
+    args.input = args.input or ENTITIES[args.entity][0].format(chronicle=args.chronicle)
+    args.output = args.output or ENTITIES[args.entity][1].format(chronicle=args.chronicle)
+    init_worker(args.parser, not args.full_pages, args.root, args.backend)  # this process parses too (workers <= 1)
+
+    cache = HtmlCache(args.root, backend=args.backend)
+    pages = Pages(cache)
+
+    print(f"♻️ Reparsing {args.entity} from {args.root} with {args.workers} {args.parser} workers: {args.input} → {args.output}")
+    REPARSERS[args.entity](args, pages)
+
+    if pages.missing:
+        print(f"⚠️ {len(pages.missing)} pages are not in the cache (run the details script to fetch them), e.g. {pages.missing[0]}")
+    cache.print_stats()
+    cache.close()
+    _reader.close()
+
+
+# Workers re-import this module to find the parse functions: only the main process runs the reparse
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+# server/chronicle switch over plain HTTP, with a cookie jar persisted per chronicle
+import json
+import os
+import re
+import time
+from urllib.parse import urlsplit
+from fetcher import MAX_RETRIES, new_session
+from rate_limiter import AdaptiveRateLimiter
+
+# --- Config ---
+BASE_URL = "https://mw2.wiki"
+COOKIE_DIR = "cache/cookies"
+COOKIE_MAX_AGE = 12 * 3600  # seconds before a saved jar is refreshed
+
+# --- Chronicle ↔ Server mapping ---
+SERVER_MAP = {
+    "eternal": 1,
+    "interlude": 2,
+    "lu4": 10,
+    "lu4_pink": 11
+}
+SERVER_NAMES = {v: k for k, v in SERVER_MAP.items()}
+
+# Value the wiki expects for /wiki/profile/set-chronicles
+CHRONICLE_CODES = {
+    "eternal": "eternal",
+    "interlude": "interlude",
+    "lu4": "lu4",
+    "lu4_pink": "lu4"
+}
+
+
+def cookie_jar_path(chronicle: str) -> str:
+    return os.path.join(COOKIE_DIR, f"{chronicle}.json")
+
+
+def _host(base_url: str) -> str:
+    return urlsplit(base_url).hostname or ""
+
+
+def _cookie_matches(domain: str, host: str) -> bool:
+    domain = (domain or "").lower()
+    if domain.startswith("."):
+        return host == domain[1:] or host.endswith(domain)
+    return host == domain
+
+
+def session_cookies(session):
+    """Export a requests cookie jar as Selenium-style cookie dicts."""
+    cookies = []
+    for c in session.cookies:
+        cookie = {"name": c.name, "value": c.value, "domain": c.domain, "path": c.path or "/", "secure": bool(c.secure)}
+        if c.expires:
+            cookie["expiry"] = int(c.expires)
+        cookies.append(cookie)
+    return cookies
+
+
+def load_cookie_jar(chronicle: str):
+    """Return the saved jar as {"saved_at": ..., "cookies": [...]}, or None."""
+    path = cookie_jar_path(chronicle)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"⚠️ Ignoring unreadable cookie jar {path}: {e}")
+        return None
+
+
+def save_cookie_jar(chronicle: str, cookies):
+    """Merge cookies into the chronicle's jar on disk (other hosts are kept)."""
+    jar = load_cookie_jar(chronicle) or {"cookies": []}
+    new_keys = {(c["name"], c["domain"], c["path"]) for c in cookies}
+    merged = [c for c in jar["cookies"] if (c["name"], c["domain"], c["path"]) not in new_keys] + list(cookies)
+
+    os.makedirs(COOKIE_DIR, exist_ok=True)
+    path = cookie_jar_path(chronicle)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"saved_at": time.time(), "cookies": merged}, f, indent=2)
+    os.replace(tmp_path, path)  # atomic, so parallel workers never read half a jar
+
+
+def _limited(limiter, send):
+    """Run send() through the limiter, retrying 429/503 responses like Fetcher does."""
+    for attempt in range(MAX_RETRIES + 1):
+        limiter.acquire()
+        resp = send()
+        if not limiter.on_response(resp.status_code, resp.headers.get("Retry-After")):
+            break
+    return resp
+
+
+def switch_server(chronicle: str, base_url: str = BASE_URL, session=None, limiter=None):
+    """Switch server + chronicle with the CSRF-protected POSTs and persist the cookies.
+
+    Every request goes through limiter (the caller's shared one, if any).
+    Returns the cookies (Selenium-style dicts) for base_url's host.
+    """
+    server_id = SERVER_MAP[chronicle]
+    session = session or new_session()
+    limiter = limiter or AdaptiveRateLimiter()
+    print(f"🔄 Switching to server_id={server_id} ({chronicle}) on {base_url}...")
+
+    resp = _limited(limiter, lambda: session.get(base_url, timeout=15))
+    resp.raise_for_status()
+    match = re.search(r"""<meta\s+name=["']csrf-token["']\s+content=["']([^"']+)["']""", resp.text)
+    if not match:
+        raise RuntimeError(f"CSRF token not found on {base_url}")
+    csrf_token = match.group(1)
+
+    headers = {"X-CSRF-Token": csrf_token, "X-Requested-With": "XMLHttpRequest"}
+    posts = [
+        ("/wiki/profile/set-server", {"_csrf": csrf_token, "server_id": server_id}),
+        ("/wiki/profile/set-chronicles", {"_csrf": csrf_token, "chronicle": CHRONICLE_CODES[chronicle]}),
+    ]
+    for path, data in posts:
+        r = _limited(limiter, lambda: session.post(base_url + path, data=data, headers=headers, timeout=15))
+        if not r.ok:
+            raise RuntimeError(f"{path} failed with HTTP {r.status_code}")
+
+    host = _host(base_url)
+    cookies = [c for c in session_cookies(session) if _cookie_matches(c["domain"], host)]
+    save_cookie_jar(chronicle, cookies)
+    print(f"✅ Switched to {chronicle}; saved {len(cookies)} cookies → {cookie_jar_path(chronicle)}")
+    return cookies
+
+
+def server_cookies(chronicle: str, base_url: str = BASE_URL, refresh: bool = False, limiter=None):
+    """Return cookies for chronicle on base_url's host, switching only if the jar is missing or old."""
+    jar = load_cookie_jar(chronicle)
+    if jar and not refresh and time.time() - jar.get("saved_at", 0) < COOKIE_MAX_AGE:
+        host = _host(base_url)
+        cookies = [c for c in jar["cookies"] if _cookie_matches(c["domain"], host)]
+        if cookies:
+            print(f"🍪 Reusing {len(cookies)} saved cookies for {chronicle} ({host})")
+            return cookies
+    return switch_server(chronicle, base_url, limiter=limiter)
+
+
+def apply_to_driver(driver, chronicle: str, base_url: str = BASE_URL, limiter=None):
+    """Put the chronicle's cookies into a Selenium driver (no dropdown clicking)."""
+    cookies = server_cookies(chronicle, base_url, limiter=limiter)
+    driver.get(base_url)  # add_cookie only works on the cookie's domain
+    for cookie in cookies:
+        try:
+            driver.add_cookie(cookie)
+        except Exception as e:
+            print(f"⚠️ Skipped cookie {cookie.get('name')}: {e}")
+    driver.get(base_url)
+    return cookies
@@ -0,0 +1,220 @@
+# skill pages → details rows: extraction shared by get_skills_details.py and the offline reparse
+import json
+import os
+import re
+from html_parser import make_soup
+
+CACHE_DIR = "cache/skills_details_data"  # old per-script HTML cache (imported into the shared cache on first read)
+
+
+# --- Helper: convert to snake_case ---
+def to_snake_case(text):
+    text = text.strip().lower()
+    text = re.sub(r"[^a-z0-9]+", "_", text)
+    return text.strip("_")
+
+def legacy_cache_file(skill_name, skill_id, chronicle, suffix):
+    """Old cache file of a skill page (suffix "main" or "lv<N>")."""
+    safe_name = re.sub(r"[^a-zA-Z0-9_]+", "_", skill_name.lower()).strip("_")
+    return os.path.join(CACHE_DIR, chronicle, f"{safe_name}_{skill_id}_{suffix}.html")
+
+
+def parse_skill_main(html_source, skill_name, skill_link):
+    """Icons and level links of a skill's main page, or None if the page has no #result-title."""
+    soup = make_soup(html_source, "skill")
+
+    # --- Extract top info ---
+    result_div = soup.select_one("div#result-title")
+    if not result_div:
+        return None
+
+    # existing main icon
+    icon_src = result_div.select_one(".item-icon img:not(.item-icon__panel)")
+    icon_src = icon_src["src"] if icon_src else ""
+
+    # NEW: panel icon
+    icon_panel_tag = result_div.select_one(".item-icon img.item-icon__panel")
+    icon_panel_src = icon_panel_tag["src"] if icon_panel_tag else ""
+
+    skill_level = result_div.select_one(".item-name__additional").get_text(" ", strip=True) if result_div.select_one(".item-name__additional") else ""
+    skill_description = result_div.select_one("div p").get_text(" ", strip=True) if result_div.select_one("div p") else ""
+
+    # --- Extract all skill levels (if available) ---
+    level_table = soup.select_one("table.table-stripped.table-vcenter")
+    if level_table:
+        level_links = []
+        for tr in level_table.select("tr"):
+            a_tag = tr.select_one("a.item-name")
+            desc_td = tr.select("td")[1] if len(tr.select("td")) > 1 else None
+            if not a_tag:
+                continue
+
+            href = a_tag["href"].strip()
+            level_text = a_tag.select_one(".item-name__additional")
+            level_raw = level_text.get_text(" ", strip=True) if level_text else ""
+            # Extract only the integer (e.g., "Lv. 1 [selected]" → 1)
+            match = re.search(r"(\d+)", level_raw)
+            skill_level = int(match.group(1)) if match else None
+
+            skill_desc = desc_td.get_text(" ", strip=True) if desc_td else ""
+
+            # Absolute link
+            base = "/".join(skill_link.split("/")[:3])
+            full_link = f"{base}{href}" if href.startswith("/") else href
+
+            level_links.append({
+                "level": skill_level,
+                "link": full_link,
+                "description": skill_desc
+            })
+    else:
+        # If no multi-level table, treat current page as single-level
+        match = re.search(r"(\d+)", skill_level or "")
+        level_int = int(match.group(1)) if match else 1
+        level_links = [{
+            "level": level_int,
+            "link": skill_link,
+            "description": skill_description
+        }]
+
+    return {
+        "icon_src": icon_src,
+        "icon_panel_src": icon_panel_src,
+        "multi_level": level_table is not None,
+        "level_links": level_links,
+    }
+
+
+def parse_skill_level(html_source):
+    """Properties table of one skill level page as {snake_case_key: value}."""
+    level_soup = make_soup(html_source, "skill")
+
+    # --- Extract property table ---
+    props = {}
+    table = level_soup.select_one("table.table-vcenter")
+    if table:
+        for tr in table.select("tr"):
+            tds = tr.select("td")
+            if len(tds) < 2:
+                continue
+
+            key_raw = tds[0].get_text(" ", strip=True)
+            val_raw = tds[1].get_text(" ", strip=True)
+            key = to_snake_case(key_raw)
+            val = val_raw.strip()
+
+            # --- Individual property handling ---
+            if key == "type":
+                val = val.strip()
+
+            elif key == "uses":
+                # Default
+                mp_cost = None
+                extra_uses = []
+
+                # --- Extract MP ---
+                mp_match = re.search(r"(\d+)\s*MP", val, re.IGNORECASE)
+                if mp_match:
+                    mp_cost = int(mp_match.group(1))
+
+                # --- Extract extra item uses (like Spirit Ore, Energy Stone, etc.) ---
+                for a in tds[1].select("a.item-name"):
+                    item_link = a.get("href", "").strip()
+                    # /item/3031/lu4 → 3031
+                    item_id_match = re.search(r"/item/(\d+)", item_link)
+                    item_id = int(item_id_match.group(1)) if item_id_match else None
+
+                    item_name_tag = a.select_one(".item-name__content")
+                    if item_name_tag:
+                        item_text = item_name_tag.get_text(" ", strip=True)
+                        # "Spirit Ore, 5 pcs" → name + count
+                        m = re.match(r"(.+?),\s*(\d+)\s*pcs", item_text)
+                        if m:
+                            name = m.group(1).strip()
+                            count = int(m.group(2))
+                        else:
+                            name = item_text.strip()
+                            count = None
+                    else:
+                        name, count = None, None
+
+                    extra_uses.append({
+                        "item_id": item_id,
+                        "item_name": name,
+                        "item_count": count
+                    })
+
+                # Save both MP and extra items
+                val = mp_cost
+                if extra_uses:
+                    props["uses_extra"] = json.dumps(extra_uses, ensure_ascii=False)
+
+
+            elif key == "cooldown_time":
+                match = re.search(r"(\d+)", val)
+                val = int(match.group(1)) if match else None
+
+            elif key == "can_it_be_used_at_the_olympiad":
+                val = val.strip().lower() == "yes"
+
+            elif key == "attribute":
+                val = val.strip()
+
+            elif key == "trait":
+                val = val.strip("{}").replace("trait_", "").strip()
+
+            elif key == "range_of_use":
+                match = re.match(r"(\d+)\s*\((\d+)\)", val)
+                if match:
+                    props["range_min"] = int(match.group(1))
+                    props["range_max"] = int(match.group(2))
+                    continue  # skip adding "range_of_use"
+                else:
+                    val = val.strip()
+
+            elif key == "available_for":
+                links = tds[1].select("a")
+                class_data = []
+                for a in links:
+                    text = a.get_text(" ", strip=True)
+                    m = re.match(r"([A-Za-z\s]+)\s*Lv\.\s*(\d+)", text)
+                    if m:
+                        cls = m.group(1).strip()
+                        lvl_num = int(m.group(2))
+                        class_data.append({"class": cls, "level": lvl_num})
+                    else:
+                        class_data.append({"class": text, "level": None})
+                val = json.dumps(class_data, ensure_ascii=False)
+
+            else:
+                val = val.strip()
+
+            props[key] = val
+    return props
+
+
+def skill_row(skill_id, skill_name, skill_icon, chronicle, main, lvl, props):
+    """Details row of one skill level (main = parse_skill_main output, lvl = one of its level_links)."""
+    # --- Clean skill icon filename ---
+    icon_clean = re.sub(r"^/icon64/|\.png$", "", main["icon_src"] or skill_icon)
+
+    # --- Ensure skill_id is integer ---
+    try:
+        skill_id_int = int(skill_id)
+    except:
+        match = re.search(r"(\d+)", str(skill_id))
+        skill_id_int = int(match.group(1)) if match else None
+
+    # --- Build data row for this level ---
+    data = {
+        "skill_id": skill_id_int,
+        "skill_name": skill_name,
+        "skill_icon": icon_clean,
+        "skill_icon_panel": re.sub(r"^/icon64/|\.png$", "", main["icon_panel_src"]),
+        "skill_level": lvl["level"],
+        "skill_description": lvl["description"],
+        "skill_link": lvl["link"],
+        "chronicle": chronicle,
+    }
+    data.update(props)
+    return data
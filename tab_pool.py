@@ -0,0 +1,148 @@
+# many tabs (CDP targets) inside one Chrome, navigated at the same time
+import time
+from collections import deque
+from rate_limiter import AdaptiveRateLimiter
+
+# --- Config ---
+TABS = 6              # tabs driven concurrently inside one Chrome
+TAB_TIMEOUT = 30      # seconds a tab may spend on one job
+POLL_INTERVAL = 0.1   # seconds between polling rounds over all tabs
+MAX_RETRIES = 5       # re-queues per job after a 429 page
+
+# Navigation is fire-and-forget: the flag lives on the old window object,
+# so it disappears as soon as the new document replaces it.
+NAVIGATE_JS = "window.__tabPoolStale = true; window.location.href = arguments[0];"
+
+STATE_JS = """
+if (window.__tabPoolStale) return 'navigating';
+if (document.readyState === 'loading') return 'loading';
+if (document.title.indexOf('429') !== -1) return 'throttled';
+return 'loaded';
+"""
+
+HAS_SELECTOR_JS = "return !!document.querySelector(arguments[0]);"
+
+CLICK_TEXT_JS = """
+const link = Array.from(document.querySelectorAll('a'))
+    .find(a => a.textContent.indexOf(arguments[0]) !== -1);
+if (!link) return false;
+link.click();
+return true;
+"""
+
+
+def tab_job(url, ready="body", click_text=None, done=None):
+    """Describe one page: wait for `ready`, optionally click a link by text, then wait for `done`."""
+    return {"url": url, "ready": ready, "click_text": click_text, "done": done}
+
+
+class TabPool:
+    """Drive several tabs of one Selenium Chrome concurrently.
+
+    Navigations are started in every free tab without blocking, then the pool
+    polls the tabs round-robin and captures page_source from whichever is
+    ready. One browser process serves TABS pages in flight.
+    """
+
+    def __init__(self, driver, tabs=TABS, timeout=TAB_TIMEOUT, limiter=None, setup=None, capture=None):
+        self.driver = driver
+        self.timeout = timeout
+        self.capture = capture  # raw_capture.DocumentCapture: keep server bytes for jobs without clicks
+        self.limiter = limiter or AdaptiveRateLimiter()
+        self.main_handle = driver.current_window_handle
+        self.handles = [self.main_handle]
+        for _ in range(tabs - 1):
+            driver.switch_to.new_window("tab")
+            if setup is not None:
+                setup(driver)  # per-tab CDP state, e.g. page_types.block_requests
+            self.handles.append(driver.current_window_handle)
+        driver.switch_to.window(self.main_handle)
+
+    def _start(self, handle, index, job):
+        self.driver.switch_to.window(handle)
+        self.limiter.acquire()
+        self.driver.execute_script(NAVIGATE_JS, job["url"])
+        return {"index": index, "job": job, "phase": "load", "deadline": time.monotonic() + self.timeout}
+
+    def _poll(self, task):
+        """Advance one tab; return 'wait', 'done', 'timeout', 'failed' or 'throttled'."""
+        job = task["job"]
+        state = self.driver.execute_script(STATE_JS)
+        if state == "throttled":
+            return "throttled"
+        if state == "loaded":
+            if task["phase"] == "load" and self.driver.execute_script(HAS_SELECTOR_JS, job["ready"]):
+                if not job["click_text"]:
+                    return "done"
+                if not self.driver.execute_script(CLICK_TEXT_JS, job["click_text"]):
+                    print(f"⚠️ '{job['click_text']}' link not found on {job['url']}")
+                    return "done"
+                task["phase"] = "click"
+            if task["phase"] == "click" and (not job["done"] or self.driver.execute_script(HAS_SELECTOR_JS, job["done"])):
+                return "done"
+        if time.monotonic() > task["deadline"]:
+            # Still on the previous document → nothing of this job to keep
+            return "failed" if state == "navigating" else "timeout"
+        return "wait"
+
+    def fetch(self, jobs):
+        """Run jobs across the tabs; return page_source per job in input order (None on failure)."""
+        results = [None] * len(jobs)
+        retries = [0] * len(jobs)
+        pending = deque(enumerate(jobs))
+        active = {}
+        done = 0
+
+        while pending or active:
+            for handle in self.handles:
+                if handle not in active and pending:
+                    index, job = pending.popleft()
+                    active[handle] = self._start(handle, index, job)
+
+            for handle, task in list(active.items()):
+                self.driver.switch_to.window(handle)
+                try:
+                    status = self._poll(task)
+                except Exception as e:
+                    print(f"⚠️ Tab error on {task['job']['url']}: {e}")
+                    status = "failed"
+
+                if status == "wait":
+                    continue
+
+                del active[handle]
+                index = task["index"]
+                if status == "throttled":
+                    self.limiter.on_throttle()
+                    retries[index] += 1
+                    if retries[index] <= MAX_RETRIES:
+                        pending.appendleft((index, task["job"]))
+                    else:
+                        print(f"❌ Still rate limited after {MAX_RETRIES} retries: {task['job']['url']}")
+                    continue
+
+                if status == "failed":
+                    print(f"❌ Tab could not load {task['job']['url']}")
+                    continue
+                if status == "timeout":
+                    print(f"⚠️ Tab timed out on {task['job']['url']} — keeping what loaded.")
+                else:
+                    self.limiter.on_success()
+                raw = self.capture.body() if self.capture and not task["job"]["click_text"] else None
+                results[index] = raw or self.driver.page_source
+                done += 1
+                if done % 20 == 0 or done == len(jobs):
+                    print(f"🗂 {done}/{len(jobs)} pages loaded in tabs")
+
+            time.sleep(POLL_INTERVAL)
+
+        self.driver.switch_to.window(self.main_handle)
+        return results
+
+    def close(self):
+        """Close the extra tabs and return to the original one."""
+        for handle in self.handles[1:]:
+            self.driver.switch_to.window(handle)
+            self.driver.close()
+        self.handles = [self.main_handle]
+        self.driver.switch_to.window(self.main_handle)
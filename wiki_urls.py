@@ -0,0 +1,51 @@
+# canonical identity of wiki pages: the same entity maps to one key whatever host, slug or suffix its URL uses
+import re
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+# --- Config ---
+WIKI_HOSTS = ("mw2.wiki", "wiki.mw2.wiki", "wikipedia1.mw2.wiki")  # mirrors of the same wiki
+ENTITY_TYPES = ("item", "skill", "npc", "quest", "class", "set")
+
+# /<type>/<id>[-slug][/<level>][/<chronicle>], e.g. /skill/3-power-strike/2/lu4, /item/57-adena/eternal
+ENTITY_PATH = re.compile(
+    r"^/(?P<type>" + "|".join(ENTITY_TYPES) + r")/(?P<id>\d+)(?:-[^/]*)?"
+    r"(?:/(?P<level>\d+))?(?:/(?P<chronicle>[a-z][a-z0-9_]*))?/?$",
+    re.I,
+)
+
+
+def is_wiki_url(url):
+    host = urlsplit(url.strip()).netloc.lower().split(":")[0]
+    return host in WIKI_HOSTS
+
+
+def parse_entity_url(url):
+    """(entity_type, id, level, chronicle) of a wiki entity URL; level/chronicle are None when absent.
+
+    Returns None for URLs that are not entity pages (lists, searches, other sites).
+    """
+    if not is_wiki_url(url):
+        return None
+    m = ENTITY_PATH.match(urlsplit(url.strip()).path)
+    if not m:
+        return None
+    level = int(m.group("level")) if m.group("level") else None
+    chronicle = m.group("chronicle").lower() if m.group("chronicle") else None
+    return m.group("type").lower(), int(m.group("id")), level, chronicle
+
+
+def entity_key(url):
+    """Host- and slug-independent key like "skill/3/2" for an entity URL (plus its sorted query), else None.
+
+    The chronicle is left out: callers key pages by chronicle themselves,
+    and some links (skill levels on wikipedia1) carry none.
+    """
+    entity = parse_entity_url(url)
+    if entity is None:
+        return None
+    entity_type, entity_id, level, _ = entity
+    key = f"{entity_type}/{entity_id}/{level or ''}"
+    query = urlsplit(url.strip()).query
+    if query:
+        key += "?" + urlencode(sorted(parse_qsl(query, keep_blank_values=True)))
+    return key